@@ -0,0 +1,15 @@
+"""
+Optional numba support.
+
+numba is an optional dependency: modules define plain NumPy versions of
+their kernels and, when HAVE_NUMBA is set, redefine them under @njit.
+"""
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    njit = None
+    HAVE_NUMBA = False
+
+__all__ = ["njit", "HAVE_NUMBA"]
@@ -2,14 +2,23 @@
 Core alignment analyzer module.
 """
 
+import copy
 import json
-from dataclasses import dataclass, asdict
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, asdict, is_dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Literal
 
 import numpy as np
 
+try:
+    import orjson
+except ImportError:  # optional speed-up, stdlib json is used otherwise
+    orjson = None
+
 from .robot_config import get_robot_config, RobotConfig
 from .data_loader import DatasetLoader
 from .signal_processing import SignalProcessor, AlignmentEvent
@@ -44,7 +53,32 @@ class AlignmentReport:
     max_offset: int
     offset_distribution: dict
     conclusion: str
-    events: list
+    events: list[AlignmentEvent]
+
+
+def _json_default(obj):
+    """Fallback encoder for stdlib json: dataclasses and numpy scalars."""
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path: Path, obj) -> None:
+    """Write obj (dicts / dataclasses) as indented UTF-8 JSON."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False, default=_json_default)
+
+
+def _analyze_episode_worker(analyzer: "AlignmentAnalyzer", episode: int,
+                            output_dir: Path, verbose: bool,
+                            episode_data: tuple = None) -> "AlignmentReport":
+    """Process-pool entry point: analyze one episode with a pickled analyzer."""
+    return analyzer.analyze_episode(episode, output_dir, verbose, episode_data)
 
 
 class AlignmentAnalyzer:
@@ -62,7 +96,9 @@ class AlignmentAnalyzer:
                  gripper: Literal["left", "right"] = "left",
                  robot_type: str = None,
                  use_denoise: bool = False,
-                 denoise_method: str = "state_guided"):
+                 denoise_method: str = "state_guided",
+                 hwaccel: str = None,
+                 roi_stride: int = 1):
         """
         Initialize analyzer.
 
@@ -74,6 +110,8 @@ class AlignmentAnalyzer:
             robot_type: Override auto-detected robot type
             use_denoise: Whether to apply denoising
             denoise_method: Denoising method
+            hwaccel: Hardware video decoder device type (e.g. "cuda")
+            roi_stride: Subsample the tracked ROI by this factor in each axis
         """
         self.dataset_dir = Path(dataset_dir)
         self.detection_mode = detection_mode
@@ -98,12 +136,14 @@ class AlignmentAnalyzer:
         self.camera = camera or self.robot_config.get_default_camera()
 
         # Initialize other components
-        self.tracker = VideoTracker(detection_mode, self.robot_type, self.camera)
+        self.tracker = VideoTracker(detection_mode, self.robot_type, self.camera,
+                                    hwaccel=hwaccel, stride=roi_stride)
         self.signal_processor = SignalProcessor(self.fps)
         self.visualizer = AlignmentVisualizer()
 
     def analyze_episode(self, episode: int, output_dir: Path = None,
-                        verbose: bool = True) -> AlignmentReport:
+                        verbose: bool = True,
+                        episode_data: tuple = None) -> AlignmentReport:
         """
         Analyze frame-state alignment for a single episode.
 
@@ -111,6 +151,7 @@ class AlignmentAnalyzer:
             episode: Episode index
             output_dir: Output directory (default: dataset_dir/alignment_analysis)
             verbose: Print progress messages
+            episode_data: Pre-loaded (state, action, num_frames); loaded from disk if None
 
         Returns:
             AlignmentReport
@@ -125,7 +166,9 @@ class AlignmentAnalyzer:
             print(f"Format: {self.format_info.version}, FPS: {self.fps}, Robot: {self.robot_type}")
 
         # Load data
-        state, _, num_frames = self.loader.load_episode(episode)
+        if episode_data is None:
+            episode_data = self.loader.load_episode(episode)
+        state, _, num_frames = episode_data
         if verbose:
             print(f"Loaded {num_frames} frames")
 
@@ -188,39 +231,101 @@ class AlignmentAnalyzer:
 
         # Save JSON report
         report_path = output_dir / f"episode_{episode:06d}_report.json"
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(asdict(report), f, indent=2, ensure_ascii=False)
+        _write_json(report_path, report)
         if verbose:
             print(f"Report saved: {report_path}")
 
         return report
 
-    def analyze_all_episodes(self, output_dir: Path = None, verbose: bool = True) -> dict:
+    def analyze_all_episodes(self, output_dir: Path = None, verbose: bool = True,
+                             workers: int = None,
+                             executor: Literal["process", "thread"] = "process") -> dict:
         """
         Analyze all episodes in the dataset.
 
+        Episodes are independent (own video, own state), so they are fanned
+        out over a process or thread pool when more than one worker is available.
+
+        Args:
+            output_dir: Output directory (default: dataset_dir/alignment_analysis)
+            verbose: Print progress messages
+            workers: Number of workers (default: CPU count, 1 = serial)
+            executor: "process" pool, or "thread" pool (decode and the diff
+                kernels run without the GIL; no pickling of the analyzer)
+
         Returns:
             Summary report dictionary
         """
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
         output_dir = output_dir or (self.dataset_dir / "alignment_analysis")
         episodes = self.loader.list_episodes()
+        workers = min(workers or os.cpu_count() or 1, len(episodes))
 
         if verbose:
             print(f"Found {len(episodes)} episodes (format: {self.format_info.version})")
 
+        # v3 datasets: read each merged data file once instead of re-scanning it per episode
+        preloaded = {}
+        if self.format_info.is_v3:
+            preloaded = {ep: (state, action, n)
+                         for ep, state, action, n in self.loader.iter_v3_episodes()}
+
         all_offsets = []
         reports = []
 
-        for ep in episodes:
+        def collect(ep, run):
             try:
-                report = self.analyze_episode(ep, output_dir, verbose)
+                report = run()
                 reports.append(report)
                 if report.total_events > 0:
-                    all_offsets.extend([e["offset"] for e in report.events])
+                    all_offsets.extend([e.offset for e in report.events])
             except Exception as e:
                 if verbose:
                     print(f"⚠ Error analyzing episode {ep}: {e}")
 
+        if workers > 1 and executor == "thread":
+            # Each thread draws into its own figure; other components are shared
+            local = threading.local()
+
+            def run_in_thread(ep, episode_data):
+                analyzer = getattr(local, "analyzer", None)
+                if analyzer is None:
+                    analyzer = local.analyzer = copy.copy(self)
+                    analyzer.visualizer = AlignmentVisualizer()
+                return analyzer.analyze_episode(ep, output_dir, verbose, episode_data)
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [(ep, pool.submit(run_in_thread, ep, preloaded.get(ep)))
+                           for ep in episodes]
+                # Collect in episode order so the summary is deterministic
+                for ep, future in futures:
+                    collect(ep, future.result)
+        elif workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    (ep, pool.submit(_analyze_episode_worker, self, ep, output_dir, verbose,
+                                     preloaded.get(ep)))
+                    for ep in episodes
+                ]
+                # Collect in episode order so the summary is deterministic
+                for ep, future in futures:
+                    collect(ep, future.result)
+        else:
+            # Serial path: prefetch episode N+1 in the background while N is analyzed
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                pending = None
+                if episodes:
+                    pending = prefetcher.submit(self._prefetch_episode, episodes[0],
+                                                preloaded.get(episodes[0]))
+                for i, ep in enumerate(episodes):
+                    current = pending
+                    if i + 1 < len(episodes):
+                        nxt = episodes[i + 1]
+                        pending = prefetcher.submit(self._prefetch_episode, nxt, preloaded.get(nxt))
+                    collect(ep, lambda ep=ep, current=current: self.analyze_episode(
+                        ep, output_dir, verbose, current.result()))
+
         # Generate summary
         if len(all_offsets) > 0:
             summary = {
@@ -235,13 +340,12 @@ class AlignmentAnalyzer:
                 "overall_std_offset_frames": float(np.std(all_offsets)),
                 "overall_min_offset": int(min(all_offsets)),
                 "overall_max_offset": int(max(all_offsets)),
-                "episode_reports": [asdict(r) for r in reports]
+                "episode_reports": reports
             }
 
             # Save summary
             summary_path = output_dir / "summary_report.json"
-            with open(summary_path, "w", encoding="utf-8") as f:
-                json.dump(summary, f, indent=2, ensure_ascii=False)
+            _write_json(summary_path, summary)
 
             if verbose:
                 print(f"\n{'='*60}")
@@ -258,6 +362,20 @@ class AlignmentAnalyzer:
 
         return {"error": "No events detected in any episode"}
 
+    def _prefetch_episode(self, episode: int, episode_data: tuple = None) -> tuple:
+        """Load an episode's (state, action, num_frames) and ask the OS to read ahead its video."""
+        try:
+            video_path = self.loader.get_video_path(episode, self.camera)
+            if hasattr(os, "posix_fadvise"):
+                fd = os.open(video_path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+        except OSError:
+            pass  # missing video is reported by analyze_episode itself
+        return episode_data if episode_data is not None else self.loader.load_episode(episode)
+
     def _create_report(self, episode: int, num_frames: int, offsets: list[int],
                        events: list[AlignmentEvent], verbose: bool) -> AlignmentReport:
         """Create alignment report from analysis results."""
@@ -281,9 +399,13 @@ class AlignmentAnalyzer:
                 events=[]
             )
 
-        mean_offset = np.mean(offsets)
-        median_offset = np.median(offsets)
-        std_offset = np.std(offsets)
+        # Reduce over a single int64 array instead of re-scanning the list per statistic
+        offset_arr = np.fromiter((e.offset for e in events), dtype=np.int64, count=len(events))
+        min_offset = int(offset_arr.min())
+        max_offset = int(offset_arr.max())
+        mean_offset = float(offset_arr.mean())
+        median_offset = float(np.median(offset_arr))
+        std_offset = float(offset_arr.std())
         offset_ms = mean_offset * 1000 / self.fps
 
         # Generate conclusion
@@ -300,13 +422,14 @@ class AlignmentAnalyzer:
             print(f"Mean offset: {mean_offset:+.2f} frames ({offset_ms:+.1f}ms)")
             print(f"Median offset: {median_offset:+.1f} frames")
             print(f"Std offset: {std_offset:.2f} frames")
-            print(f"Range: [{min(offsets):+d}, {max(offsets):+d}] frames")
+            print(f"Range: [{min_offset:+d}, {max_offset:+d}] frames")
             print(f"\nConclusion: {conclusion}")
 
-        # Compute offset distribution
-        offset_dist = {}
-        for o in range(min(offsets) - 1, max(offsets) + 2):
-            offset_dist[str(o)] = int(sum(1 for x in offsets if x == o))
+        # Compute offset distribution (one bincount over [min - 1, max + 1])
+        lo = min_offset - 1
+        hi = max_offset + 2
+        counts = np.bincount(offset_arr - lo, minlength=hi - lo)
+        offset_dist = {str(lo + i): int(c) for i, c in enumerate(counts)}
 
         return AlignmentReport(
             dataset_dir=str(self.dataset_dir),
@@ -314,13 +437,13 @@ class AlignmentAnalyzer:
             analysis_time=datetime.now().isoformat(),
             total_frames=num_frames,
             total_events=len(offsets),
-            mean_offset_frames=float(mean_offset),
-            mean_offset_ms=float(offset_ms),
-            median_offset_frames=float(median_offset),
-            std_offset_frames=float(std_offset),
-            min_offset=int(min(offsets)),
-            max_offset=int(max(offsets)),
+            mean_offset_frames=mean_offset,
+            mean_offset_ms=offset_ms,
+            median_offset_frames=median_offset,
+            std_offset_frames=std_offset,
+            min_offset=min_offset,
+            max_offset=max_offset,
             offset_distribution=offset_dist,
             conclusion=conclusion,
-            events=[asdict(e) for e in events]
+            events=events
         )
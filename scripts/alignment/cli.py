@@ -10,7 +10,26 @@ from .analyzer import AlignmentAnalyzer
 from .robot_config import list_robot_types, get_robot_config
 
 
+_PARSER: argparse.ArgumentParser | None = None
+
+
 def create_parser() -> argparse.ArgumentParser:
+    """Return the argument parser, built on first use and reused afterwards."""
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = _build_parser()
+    return _PARSER
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for integers >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def _build_parser() -> argparse.ArgumentParser:
     """Create argument parser."""
     parser = argparse.ArgumentParser(
         description="Analyze Frame-State alignment in LeRobot datasets",
@@ -47,6 +66,10 @@ Supported robot types:
                         help="Output directory (default: dataset_dir/alignment_analysis)")
     parser.add_argument("--all-episodes", "-a", action="store_true",
                         help="Analyze all episodes")
+    parser.add_argument("--workers", "-j", type=_positive_int, default=None,
+                        help="Worker processes for --all-episodes (default: CPU count, 1 = serial)")
+    parser.add_argument("--threads", action="store_true",
+                        help="Run --workers as threads instead of processes")
 
     # Robot type option
     parser.add_argument("--robot-type", "-r", type=str, default=None,
@@ -74,6 +97,12 @@ Supported robot types:
                         choices=["state_guided", "weighted", "adaptive"],
                         help="Denoising method (default: state_guided)")
 
+    # Decoding options
+    parser.add_argument("--hwaccel", type=str, default=None,
+                        help="Hardware video decoding device, e.g. cuda (default: software)")
+    parser.add_argument("--roi-stride", type=_positive_int, default=1,
+                        help="Use every N-th ROI pixel per axis, e.g. 4 for 720p video (default: 1)")
+
     return parser
 
 
@@ -128,7 +157,9 @@ def main(args: list[str] = None) -> int:
             gripper=parsed.gripper,
             robot_type=parsed.robot_type,
             use_denoise=parsed.denoise,
-            denoise_method=parsed.denoise_method
+            denoise_method=parsed.denoise_method,
+            hwaccel=parsed.hwaccel,
+            roi_stride=parsed.roi_stride
         )
 
         # Print detected info
@@ -136,7 +167,9 @@ def main(args: list[str] = None) -> int:
               f"gripper_dim={analyzer.gripper_dim}")
 
         if parsed.all_episodes:
-            analyzer.analyze_all_episodes(output_dir)
+            analyzer.analyze_all_episodes(
+                output_dir, workers=parsed.workers,
+                executor="thread" if parsed.threads else "process")
         else:
             analyzer.analyze_episode(parsed.episode, output_dir)
 
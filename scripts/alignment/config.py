@@ -25,59 +25,52 @@ RIGHT_GRIPPER_DIM = DEFAULT_CONFIG.gripper.right_dim
 # Default FPS
 DEFAULT_FPS = DEFAULT_CONFIG.video.fps
 
-# Legacy ROI_CONFIG format
-ROI_CONFIG = {
-    "default": {
-        "wrist": {
-            "y": DEFAULT_CONFIG.roi.wrist_y,
-            "x": DEFAULT_CONFIG.roi.wrist_x,
-        },
-        "env": {
-            "y": DEFAULT_CONFIG.roi.env_y,
-            "x": DEFAULT_CONFIG.roi.env_x,
-        },
-        "full": {
-            "y": DEFAULT_CONFIG.roi.full_y,
-            "x": DEFAULT_CONFIG.roi.full_x,
-        },
-    },
-    "aloha": {
-        "wrist": {
-            "y": get_robot_config("aloha").roi.wrist_y,
-            "x": get_robot_config("aloha").roi.wrist_x,
-        },
-        "env": {
-            "y": get_robot_config("aloha").roi.env_y,
-            "x": get_robot_config("aloha").roi.env_x,
+def _legacy_roi(config) -> dict:
+    """Legacy ROI_CONFIG entry for a RobotConfig."""
+    roi = config.roi
+    return {
+        "wrist": {"y": roi.wrist_y, "x": roi.wrist_x},
+        "env": {"y": roi.env_y, "x": roi.env_x},
+        "full": {"y": roi.full_y, "x": roi.full_x},
+    }
+
+
+def _legacy_color_threshold(config) -> dict:
+    """Legacy COLOR_THRESHOLD entry for a RobotConfig."""
+    ct = config.color_threshold
+    return {
+        "orange": {
+            "r_min": ct.orange_r_range[0],
+            "r_max": ct.orange_r_range[1],
+            "g_min": ct.orange_g_range[0],
+            "g_max": ct.orange_g_range[1],
+            "b_min": ct.orange_b_range[0],
+            "b_max": ct.orange_b_range[1],
         },
-        "full": {
-            "y": get_robot_config("aloha").roi.full_y,
-            "x": get_robot_config("aloha").roi.full_x,
+        "black": {
+            "max_value": ct.black_max_value,
         },
-    },
-}
+    }
+
+
+def _legacy_analysis(config) -> dict:
+    """Legacy ANALYSIS_CONFIG entry for a RobotConfig."""
+    analysis = config.analysis
+    return {
+        "state_change_threshold": analysis.state_change_threshold,
+        "search_window": analysis.search_window,
+        "denoise_window": analysis.denoise_window,
+    }
+
+
+# Legacy ROI_CONFIG format
+ROI_CONFIG = {name: _legacy_roi(get_robot_config(name)) for name in ("default", "aloha")}
 
 # Legacy COLOR_THRESHOLD format
-COLOR_THRESHOLD = {
-    "orange": {
-        "r_min": DEFAULT_CONFIG.color_threshold.orange_r_range[0],
-        "r_max": DEFAULT_CONFIG.color_threshold.orange_r_range[1],
-        "g_min": DEFAULT_CONFIG.color_threshold.orange_g_range[0],
-        "g_max": DEFAULT_CONFIG.color_threshold.orange_g_range[1],
-        "b_min": DEFAULT_CONFIG.color_threshold.orange_b_range[0],
-        "b_max": DEFAULT_CONFIG.color_threshold.orange_b_range[1],
-    },
-    "black": {
-        "max_value": DEFAULT_CONFIG.color_threshold.black_max_value,
-    },
-}
+COLOR_THRESHOLD = _legacy_color_threshold(DEFAULT_CONFIG)
 
 # Legacy ANALYSIS_CONFIG format
-ANALYSIS_CONFIG = {
-    "state_change_threshold": DEFAULT_CONFIG.analysis.state_change_threshold,
-    "search_window": DEFAULT_CONFIG.analysis.search_window,
-    "denoise_window": DEFAULT_CONFIG.analysis.denoise_window,
-}
+ANALYSIS_CONFIG = _legacy_analysis(DEFAULT_CONFIG)
 
 
 def get_roi_config(robot_type: str, camera: str) -> dict:
@@ -94,4 +87,4 @@ def get_roi_config(robot_type: str, camera: str) -> dict:
         ROI config dict with "y" and "x" ratios
     """
     config = get_robot_config(robot_type)
-    return config.roi.get_for_camera(camera)
+    return dict(config.roi.get_for_camera(camera))
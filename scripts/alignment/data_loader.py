@@ -5,16 +5,17 @@ Supports both v2.0 (per-episode files) and v3.0 (merged files) formats.
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
 
 from .robot_config import get_robot_config, DEFAULT_CONFIG
 
 
-@dataclass
+@dataclass(frozen=True)
 class DatasetFormat:
     """Dataset format information."""
     version: str
@@ -25,52 +26,87 @@ class DatasetFormat:
     video_path_pattern: str
 
 
+def _list_column_to_2d(column) -> np.ndarray:
+    """
+    Convert an Arrow list column of equal-width rows to an [N, D] array.
+
+    Reshapes the flat child buffer instead of stacking one array per row.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    array = column.combine_chunks()
+    if pa.types.is_fixed_size_list(array.type):
+        width = array.type.list_size
+    else:
+        lengths = pc.list_value_length(array)
+        width = pc.min(lengths).as_py() if len(array) else 0
+        if len(array) and pc.max(lengths).as_py() != width:
+            raise ValueError("Column rows have different lengths, cannot form a 2D array")
+    return array.flatten().to_numpy(zero_copy_only=False).reshape(len(array), width)
+
+
+# Concurrent parquet reads when scanning v3 data files (pyarrow releases the GIL)
+MAX_READ_WORKERS = 8
+
+# Detected formats keyed by (resolved info.json path, mtime_ns, size), shared by all loaders
+_FORMAT_CACHE: dict[tuple[Path, int, int], DatasetFormat] = {}
+
+
 class DatasetLoader:
     """Loader for LeRobot datasets."""
 
     def __init__(self, dataset_dir: str | Path):
         self.dataset_dir = Path(dataset_dir)
         self.format_info = self._detect_format()
+        # camera -> index of the v2 video path candidate that matched last time
+        self._v2_video_candidate: dict[str, int] = {}
+        # parquet file -> column names, for metadata files probed repeatedly
+        self._schema_names: dict[Path, frozenset[str]] = {}
 
     def _detect_format(self) -> DatasetFormat:
         """Detect dataset format version."""
         info_path = self.dataset_dir / "meta" / "info.json"
 
         if info_path.exists():
-            with open(info_path, "r") as f:
-                info = json.load(f)
-
-            robot_type = info.get("robot_type", "default")
-            robot_config = get_robot_config(robot_type)
-
-            version = info.get("codebase_version", "v2.0")
-            fps = info.get("fps", robot_config.video.fps)
-
-            if version.startswith("v3"):
-                return DatasetFormat(
-                    version=version,
-                    fps=fps,
-                    robot_type=robot_type,
-                    is_v3=True,
-                    data_path_pattern=info.get(
-                        "data_path",
-                        "data/chunk-{chunk_index:03d}/file-{file_index:03d}.parquet"
-                    ),
-                    video_path_pattern=info.get(
-                        "video_path",
-                        robot_config.video.path_pattern
-                    ),
-                )
-
-            # v2.x format - read config from info.json
+            st = info_path.stat()
+            cache_key = (info_path.resolve(), st.st_mtime_ns, st.st_size)
+            cached = _FORMAT_CACHE.get(cache_key)
+            if cached is None:
+                cached = _FORMAT_CACHE[cache_key] = self._parse_info(info_path)
+            return cached
+
+        # Legacy format (no info.json)
+        return DatasetFormat(
+            version="v2.0",
+            fps=DEFAULT_CONFIG.video.fps,
+            robot_type="default",
+            is_v3=False,
+            data_path_pattern="data/chunk-000/episode_{episode:06d}.parquet",
+            video_path_pattern=DEFAULT_CONFIG.video.path_pattern,
+        )
+
+    @staticmethod
+    def _parse_info(info_path: Path) -> DatasetFormat:
+        """Build DatasetFormat from meta/info.json."""
+        with open(info_path, "r") as f:
+            info = json.load(f)
+
+        robot_type = info.get("robot_type", "default")
+        robot_config = get_robot_config(robot_type)
+
+        version = info.get("codebase_version", "v2.0")
+        fps = info.get("fps", robot_config.video.fps)
+
+        if version.startswith("v3"):
             return DatasetFormat(
                 version=version,
                 fps=fps,
                 robot_type=robot_type,
-                is_v3=False,
+                is_v3=True,
                 data_path_pattern=info.get(
                     "data_path",
-                    "data/chunk-000/episode_{episode:06d}.parquet"
+                    "data/chunk-{chunk_index:03d}/file-{file_index:03d}.parquet"
                 ),
                 video_path_pattern=info.get(
                     "video_path",
@@ -78,14 +114,20 @@ class DatasetLoader:
                 ),
             )
 
-        # Legacy format (no info.json)
+        # v2.x format - read config from info.json
         return DatasetFormat(
-            version="v2.0",
-            fps=DEFAULT_CONFIG.video.fps,
-            robot_type="default",
+            version=version,
+            fps=fps,
+            robot_type=robot_type,
             is_v3=False,
-            data_path_pattern="data/chunk-000/episode_{episode:06d}.parquet",
-            video_path_pattern=DEFAULT_CONFIG.video.path_pattern,
+            data_path_pattern=info.get(
+                "data_path",
+                "data/chunk-000/episode_{episode:06d}.parquet"
+            ),
+            video_path_pattern=info.get(
+                "video_path",
+                robot_config.video.path_pattern
+            ),
         )
 
     def load_episode(self, episode: int) -> tuple[np.ndarray, np.ndarray, int]:
@@ -101,34 +143,93 @@ class DatasetLoader:
 
     def _load_v2_episode(self, episode: int) -> tuple[np.ndarray, np.ndarray, int]:
         """Load episode from v2.0 format (per-episode parquet)."""
+        import pyarrow.parquet as pq
+
         parquet_path = self.dataset_dir / "data" / "chunk-000" / f"episode_{episode:06d}.parquet"
 
         if not parquet_path.exists():
             raise FileNotFoundError(f"Parquet file not found: {parquet_path}")
 
-        df = pd.read_parquet(parquet_path)
-        state = np.stack(df["observation.state"].values)
-        action = np.stack(df["action"].values)
+        table = pq.read_table(parquet_path, columns=["observation.state", "action"])
+        state = _list_column_to_2d(table.column("observation.state"))
+        action = _list_column_to_2d(table.column("action"))
 
-        return state, action, len(df)
+        return state, action, table.num_rows
+
+    @cached_property
+    def _v3_episode_files(self) -> dict[int, Path]:
+        """Map episode index -> v3 data file, built once from the episode_index column only."""
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        def read_episodes(pq_file: Path) -> list[int]:
+            episodes = pq.read_table(pq_file, columns=["episode_index"]).column("episode_index")
+            return pc.unique(episodes).to_pylist()
 
-    def _load_v3_episode(self, episode: int) -> tuple[np.ndarray, np.ndarray, int]:
-        """Load episode from v3.0 format (merged parquet)."""
         data_dir = self.dataset_dir / "data" / "chunk-000"
-        parquet_files = sorted(data_dir.glob("file-*.parquet"))
+        pq_files = sorted(data_dir.glob("file-*.parquet"))
+        if len(pq_files) > 1:
+            # Overlap the per-file reads; map() keeps file order for setdefault below
+            with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(pq_files))) as pool:
+                file_episodes = list(pool.map(read_episodes, pq_files))
+        else:
+            file_episodes = [read_episodes(f) for f in pq_files]
 
-        if not parquet_files:
-            raise FileNotFoundError(f"No parquet files found in {data_dir}")
+        index = {}
+        for pq_file, episodes in zip(pq_files, file_episodes):
+            for ep in episodes:
+                index.setdefault(ep, pq_file)
+        return index
+
+    def iter_v3_episodes(self):
+        """
+        Yield (episode, state, action, num_frames) for every v3 episode.
+
+        Reads each merged data file once and slices it per episode, instead of
+        one filtered read per episode. An episode split across files is taken
+        from the first file, as in load_episode.
+        """
+        import pyarrow.parquet as pq
+
+        seen = set()
+        data_dir = self.dataset_dir / "data" / "chunk-000"
+        for pq_file in sorted(data_dir.glob("file-*.parquet")):
+            table = pq.read_table(pq_file, columns=["episode_index", "observation.state", "action"])
+            episode_col = table.column("episode_index").to_numpy()
+            order = np.argsort(episode_col, kind="stable")
+            if np.any(order != np.arange(len(order))):
+                table = table.take(order)
+                episode_col = episode_col[order]
+
+            episodes, starts, counts = np.unique(episode_col, return_index=True, return_counts=True)
+            for ep, start, count in zip(episodes.tolist(), starts.tolist(), counts.tolist()):
+                if ep in seen:
+                    continue
+                seen.add(ep)
+                rows = table.slice(start, count)
+                yield (ep, _list_column_to_2d(rows.column("observation.state")),
+                       _list_column_to_2d(rows.column("action")), count)
 
-        for pq_file in parquet_files:
-            df = pd.read_parquet(pq_file)
-            episode_df = df[df["episode_index"] == episode]
-            if len(episode_df) > 0:
-                state = np.stack(episode_df["observation.state"].values)
-                action = np.stack(episode_df["action"].values)
-                return state, action, len(episode_df)
+    def _load_v3_episode(self, episode: int) -> tuple[np.ndarray, np.ndarray, int]:
+        """Load episode from v3.0 format (merged parquet)."""
+        import pyarrow.parquet as pq
 
-        raise ValueError(f"Episode {episode} not found in dataset")
+        pq_file = self._v3_episode_files.get(episode)
+        if pq_file is None:
+            data_dir = self.dataset_dir / "data" / "chunk-000"
+            if not any(data_dir.glob("file-*.parquet")):
+                raise FileNotFoundError(f"No parquet files found in {data_dir}")
+            raise ValueError(f"Episode {episode} not found in dataset")
+
+        # Read only this episode's rows (row-group pruning) and only the needed columns
+        table = pq.read_table(
+            pq_file,
+            columns=["observation.state", "action"],
+            filters=[("episode_index", "=", episode)],
+        )
+        state = _list_column_to_2d(table.column("observation.state"))
+        action = _list_column_to_2d(table.column("action"))
+        return state, action, table.num_rows
 
     def get_video_path(self, episode: int, camera: str) -> Path:
         """Get video file path for an episode."""
@@ -185,9 +286,15 @@ class DatasetLoader:
                 self.dataset_dir / "chunk-000" / video_key_rgb / f"episode_{episode:06d}.mp4"
             )
 
+        # Layout is the same for every episode: try the last matching candidate first
+        hit = self._v2_video_candidate.get(camera)
+        if hit is not None and candidate_paths[hit].exists():
+            return candidate_paths[hit]
+
         # Try each candidate path
-        for path in candidate_paths:
+        for i, path in enumerate(candidate_paths):
             if path.exists():
+                self._v2_video_candidate[camera] = i
                 return path
 
         # If none found, raise with helpful message
@@ -198,22 +305,28 @@ class DatasetLoader:
             f"Available cameras in dataset may have different names (e.g., '{camera}_rgb')."
         )
 
+    @cached_property
+    def _v3_episode_meta_files(self) -> dict[int, Path]:
+        """Map episode index -> meta/episodes/chunk-*/episode_*.json, scanned once."""
+        index = {}
+        episodes_dir = self.dataset_dir / "meta" / "episodes"
+        for chunk_dir in sorted(episodes_dir.glob("chunk-*")):
+            for ep_file in sorted(chunk_dir.glob("episode_*.json")):
+                index.setdefault(int(ep_file.stem.split("_")[1]), ep_file)
+        return index
+
     def _get_v3_video_path(self, episode: int, camera: str) -> Path:
         """Get video path for v3.0 format."""
         video_key = f"observation.images.{camera}"
 
         # Try to find from episode metadata
-        episodes_dir = self.dataset_dir / "meta" / "episodes"
-        if episodes_dir.exists():
-            for chunk_dir in sorted(episodes_dir.glob("chunk-*")):
-                for ep_file in sorted(chunk_dir.glob("episode_*.json")):
-                    ep_idx = int(ep_file.stem.split("_")[1])
-                    if ep_idx == episode:
-                        with open(ep_file) as f:
-                            ep_info = json.load(f)
-                        video_info = ep_info.get("videos", {}).get(video_key, {})
-                        if "video_path" in video_info:
-                            return self.dataset_dir / video_info["video_path"]
+        ep_file = self._v3_episode_meta_files.get(episode)
+        if ep_file is not None:
+            with open(ep_file) as f:
+                ep_info = json.load(f)
+            video_info = ep_info.get("videos", {}).get(video_key, {})
+            if "video_path" in video_info:
+                return self.dataset_dir / video_info["video_path"]
 
         # Fallback: assume chunk-000/file-000.mp4
         video_path = self.dataset_dir / "videos" / video_key / "chunk-000" / "file-000.mp4"
@@ -239,38 +352,46 @@ class DatasetLoader:
         if not self.format_info.is_v3:
             return (0, -1)
 
+        import pyarrow.parquet as pq
+
         fps = self.format_info.fps
         video_key = f"observation.images.{camera}"
+        from_ts_col = f"videos/{video_key}/from_timestamp"
+        to_ts_col = f"videos/{video_key}/to_timestamp"
 
         # Read from episode metadata parquet
         episodes_meta_dir = self.dataset_dir / "meta" / "episodes" / "chunk-000"
         meta_files = sorted(episodes_meta_dir.glob("file-*.parquet"))
 
-        if meta_files:
-            for meta_file in meta_files:
-                df = pd.read_parquet(meta_file)
-                ep_row = df[df["episode_index"] == episode]
-                if len(ep_row) > 0:
-                    ep_data = ep_row.iloc[0]
-                    from_ts_col = f"videos/{video_key}/from_timestamp"
-                    to_ts_col = f"videos/{video_key}/to_timestamp"
-
-                    if from_ts_col in ep_data and to_ts_col in ep_data:
-                        from_ts = ep_data[from_ts_col]
-                        to_ts = ep_data[to_ts_col]
-                        return (int(from_ts * fps), int(to_ts * fps))
+        for meta_file in meta_files:
+            if not self._has_columns(meta_file, (from_ts_col, to_ts_col)):
+                continue
+            # Only the two timestamp columns of the matching row are read
+            table = pq.read_table(
+                meta_file,
+                columns=[from_ts_col, to_ts_col],
+                filters=[("episode_index", "=", episode)],
+            )
+            if table.num_rows > 0:
+                from_ts = table.column(from_ts_col)[0].as_py()
+                to_ts = table.column(to_ts_col)[0].as_py()
+                return (int(from_ts * fps), int(to_ts * fps))
 
         return (0, -1)
 
+    def _has_columns(self, parquet_path: Path, columns: tuple[str, ...]) -> bool:
+        """Check columns against the file schema, read once per file."""
+        names = self._schema_names.get(parquet_path)
+        if names is None:
+            import pyarrow.parquet as pq
+            names = self._schema_names[parquet_path] = frozenset(pq.read_schema(parquet_path).names)
+        return all(c in names for c in columns)
+
     def list_episodes(self) -> list[int]:
         """List all available episode indices."""
         if self.format_info.is_v3:
-            data_dir = self.dataset_dir / "data" / "chunk-000"
-            parquet_files = sorted(data_dir.glob("file-*.parquet"))
-            if parquet_files:
-                df = pd.read_parquet(parquet_files[0])
-                return sorted(df["episode_index"].unique().tolist())
-            return []
+            # Union over all data files, read from the episode_index column only
+            return sorted(self._v3_episode_files)
         else:
             data_dir = self.dataset_dir / "data" / "chunk-000"
             return sorted([
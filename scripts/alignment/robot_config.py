@@ -17,11 +17,17 @@ Usage:
     default_camera = config.get_default_camera()
 """
 
+import re
 from dataclasses import dataclass, field
 from typing import Literal
 
+# Camera-name classifiers for ROIConfig.get_for_camera
+# Wrist cameras: contains "wrist" or is "handeye" (Franka wrist camera)
+_WRIST_CAMERA_RE = re.compile(r"wrist|^handeye$")
+_ENV_CAMERA_RE = re.compile(r"cam_env|cam_high|main|side")
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class GripperConfig:
     """Gripper dimension and field configuration."""
 
@@ -31,7 +37,7 @@ class GripperConfig:
     right_field: str = "right_gripper"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CameraConfig:
     """Camera naming and configuration."""
 
@@ -41,6 +47,15 @@ class CameraConfig:
     # Camera name suffix (e.g., "_rgb" for galaxea_r1_lite)
     suffix: str = ""
 
+    # Suffixed names of the predefined camera types (derived, not init arguments)
+    _resolved: dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_resolved", {
+            camera_type: f"{getattr(self, camera_type)}{self.suffix}"
+            for camera_type in ("left_wrist", "right_wrist", "env")
+        })
+
     def get_camera_name(self, camera_type: str) -> str:
         """
         Get full camera name with suffix.
@@ -52,7 +67,11 @@ class CameraConfig:
         Returns:
             Full camera name with suffix applied
         """
-        # Try to get predefined camera name
+        resolved = self._resolved.get(camera_type)
+        if resolved is not None:
+            return resolved
+
+        # Direct camera name
         base = getattr(self, camera_type, camera_type)
         return f"{base}{self.suffix}" if self.suffix else base
 
@@ -61,7 +80,7 @@ class CameraConfig:
         return self.get_camera_name("left_wrist")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class VideoConfig:
     """Video format and path configuration."""
 
@@ -73,7 +92,7 @@ class VideoConfig:
     fallback_patterns: tuple[str, ...] = ()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ROIConfig:
     """Region of Interest configuration for video tracking."""
 
@@ -87,6 +106,17 @@ class ROIConfig:
     full_y: tuple[float, float] = (0.40, 0.95)
     full_x: tuple[float, float] = (0.15, 0.85)
 
+    # Pre-built results of get_for_camera (derived, not init arguments).
+    # Plain dicts so the config stays picklable for process pools; treat as read-only.
+    _wrist: dict[str, tuple[float, float]] = field(init=False, repr=False, compare=False)
+    _env: dict[str, tuple[float, float]] = field(init=False, repr=False, compare=False)
+    _full: dict[str, tuple[float, float]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_wrist", {"y": self.wrist_y, "x": self.wrist_x})
+        object.__setattr__(self, "_env", {"y": self.env_y, "x": self.env_x})
+        object.__setattr__(self, "_full", {"y": self.full_y, "x": self.full_x})
+
     def get_for_camera(self, camera: str) -> dict[str, tuple[float, float]]:
         """
         Get ROI config based on camera name.
@@ -95,17 +125,16 @@ class ROIConfig:
             camera: Camera name
 
         Returns:
-            Dict with "y" and "x" ratio tuples
+            Dict with "y" and "x" ratio tuples (shared between calls, do not mutate)
         """
-        # Wrist cameras: contains "wrist" or is "handeye" (Franka wrist camera)
-        if "wrist" in camera or camera == "handeye":
-            return {"y": self.wrist_y, "x": self.wrist_x}
-        elif any(env_name in camera for env_name in ["cam_env", "cam_high", "main", "side"]):
-            return {"y": self.env_y, "x": self.env_x}
-        return {"y": self.full_y, "x": self.full_x}
+        if _WRIST_CAMERA_RE.search(camera):
+            return self._wrist
+        elif _ENV_CAMERA_RE.search(camera):
+            return self._env
+        return self._full
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ColorThresholdConfig:
     """Color detection threshold configuration."""
 
@@ -119,7 +148,7 @@ class ColorThresholdConfig:
     color_roi_y: tuple[float, float] = (0.5, 1.0)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AnalysisConfig:
     """Analysis parameters configuration."""
 
@@ -128,7 +157,7 @@ class AnalysisConfig:
     denoise_window: int = 10  # Window size for denoising
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RobotConfig:
     """
     Complete robot-specific configuration.
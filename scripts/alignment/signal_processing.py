@@ -8,10 +8,52 @@ from dataclasses import dataclass
 from typing import Literal
 
 import numpy as np
+from scipy.ndimage import maximum_filter1d
 
+from ._numba import HAVE_NUMBA, njit
 from .config import ANALYSIS_CONFIG, LEFT_GRIPPER_DIM
 
 
+def _window_peaks(video_diff: np.ndarray, frames: np.ndarray, search_window: int) -> np.ndarray:
+    """
+    Index of the video peak within +/- search_window of each frame.
+
+    Returns -1 for frames whose window is empty. Gathers all windows from a
+    -inf padded sliding-window view and takes one argmax over them.
+    """
+    n = len(video_diff)
+    peaks = np.full(len(frames), -1, dtype=np.int64)
+    valid = (frames + search_window >= 0) & (frames - search_window < n)
+    if not valid.any():
+        return peaks
+
+    # Row f + w of the padded view covers [f - w, f + w] for any f in [-w, n + w)
+    w = search_window
+    padded = np.full(n + 4 * w, -np.inf)
+    padded[2 * w:2 * w + n] = video_diff
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * w + 1)
+    centers = frames[valid]
+    peaks[valid] = centers - w + windows[centers + w].argmax(axis=1)
+    return peaks
+
+
+if HAVE_NUMBA:
+    # Per-event loop without the (E, 2W+1) window gather
+
+    @njit(cache=True)
+    def _window_peaks(video_diff, frames, search_window):
+        n = len(video_diff)
+        peaks = np.empty(len(frames), dtype=np.int64)
+        for i in range(len(frames)):
+            start = max(0, frames[i] - search_window)
+            end = min(n, frames[i] + search_window + 1)
+            if end <= start:
+                peaks[i] = -1
+            else:
+                peaks[i] = start + np.argmax(video_diff[start:end])
+        return peaks
+
+
 @dataclass
 class AlignmentEvent:
     """Single alignment event result."""
@@ -33,7 +75,10 @@ class SignalProcessor:
     def compute_state_diff(self, state: np.ndarray, gripper_dim: int = LEFT_GRIPPER_DIM) -> np.ndarray:
         """Compute absolute difference of gripper state."""
         gripper_state = state[:, gripper_dim]
-        return np.abs(np.concatenate([[0], np.diff(gripper_state)]))
+        state_diff = np.empty(max(len(gripper_state), 1), dtype=np.float64)
+        state_diff[0] = 0
+        np.abs(np.diff(gripper_state), out=state_diff[1:])
+        return state_diff
 
     def find_significant_changes(self, state: np.ndarray, gripper_dim: int = LEFT_GRIPPER_DIM,
                                   threshold: float = None) -> np.ndarray:
@@ -51,7 +96,7 @@ class SignalProcessor:
         threshold = threshold or self.config["state_change_threshold"]
         gripper_state = state[:, gripper_dim]
         state_diff = np.abs(np.diff(gripper_state))
-        return np.where(state_diff > threshold)[0]
+        return np.flatnonzero(state_diff > threshold)
 
     def compute_offsets(self, state_diff: np.ndarray, video_diff: np.ndarray,
                         significant_frames: np.ndarray,
@@ -72,29 +117,29 @@ class SignalProcessor:
             List of AlignmentEvent results
         """
         search_window = search_window or self.config["search_window"]
-        results = []
-
-        for sf in significant_frames:
-            start = max(0, sf - search_window)
-            end = min(len(video_diff), sf + search_window + 1)
 
-            local_video = video_diff[start:end]
-            if len(local_video) == 0:
-                continue
-
-            video_peak = start + np.argmax(local_video)
-            offset = video_peak - sf
-
-            results.append(AlignmentEvent(
-                frame=int(sf),
-                state_peak=int(sf),
-                video_peak=int(video_peak),
-                offset=int(offset),
-                offset_ms=float(offset * 1000 / self.fps),
-                state_change=float(state_diff[sf])
-            ))
-
-        return results
+        frames = np.asarray(significant_frames, dtype=np.int64)
+        peaks = _window_peaks(video_diff, frames, search_window)
+
+        found = peaks >= 0
+        frames, peaks = frames[found], peaks[found]
+        offsets = peaks - frames
+        offsets_ms = offsets * 1000 / self.fps
+        changes = state_diff[frames]
+
+        return [
+            AlignmentEvent(
+                frame=sf,
+                state_peak=sf,
+                video_peak=vp,
+                offset=off,
+                offset_ms=off_ms,
+                state_change=change,
+            )
+            for sf, vp, off, off_ms, change in zip(
+                frames.tolist(), peaks.tolist(), offsets.tolist(),
+                offsets_ms.tolist(), changes.tolist())
+        ]
 
     def denoise(self, video_diff: np.ndarray, state_diff: np.ndarray,
                 method: Literal["state_guided", "weighted", "adaptive"] = "state_guided",
@@ -129,22 +174,19 @@ class SignalProcessor:
 
         # Find significant state changes
         state_threshold = np.median(state_diff) + 0.5 * np.std(state_diff)
-        significant_indices = np.where(state_diff > state_threshold)[0]
+        significant_indices = np.flatnonzero(state_diff > state_threshold)
 
-        # Apply Gaussian-weighted windows around state events
-        for idx in significant_indices:
-            start = max(0, idx - window_size)
-            end = min(len(video_diff), idx + window_size + 1)
+        # Gaussian weights centered at state event, shared by all events
+        offsets = np.arange(-window_size, window_size + 1)
+        kernel = np.exp(-0.5 * (offsets / (window_size / 2)) ** 2)
 
-            # Gaussian weights centered at state event
-            local_indices = np.arange(start, end)
-            weights = np.exp(-0.5 * ((local_indices - idx) / (window_size / 2)) ** 2)
-
-            # Apply weighted video signal
-            denoised[start:end] = np.maximum(
-                denoised[start:end],
-                video_diff[start:end] * weights
-            )
+        # Apply Gaussian-weighted windows around all state events at once;
+        # window positions that fall outside the signal are dropped
+        window_idx = significant_indices[:, None] + offsets[None, :]
+        valid = (window_idx >= 0) & (window_idx < len(video_diff))
+        idx = window_idx[valid]
+        weights = np.broadcast_to(kernel, window_idx.shape)[valid]
+        np.maximum.at(denoised, idx, video_diff[idx] * weights)
 
         return denoised
 
@@ -153,10 +195,12 @@ class SignalProcessor:
         """Weight video signal by state envelope."""
         state_norm = state_diff / (state_diff.max() + 1e-8)
 
-        # Smooth state signal to create envelope
+        # Smooth state signal to create envelope: moving average over
+        # [i - window_size, i + window_size] (zero outside), via a running sum
         kernel_size = window_size * 2 + 1
-        kernel = np.ones(kernel_size) / kernel_size
-        state_envelope = np.convolve(state_norm, kernel, mode="same")
+        padded = np.concatenate([np.zeros(window_size + 1), state_norm, np.zeros(window_size)])
+        csum = np.cumsum(padded)
+        state_envelope = (csum[kernel_size:] - csum[:-kernel_size]) / kernel_size
         state_envelope = np.clip(state_envelope * 3, 0, 1)
 
         return video_diff * state_envelope
@@ -164,25 +208,20 @@ class SignalProcessor:
     def _denoise_adaptive(self, video_diff: np.ndarray, state_diff: np.ndarray,
                            window_size: int) -> np.ndarray:
         """Adaptive thresholding based on state activity."""
-        denoised = np.zeros_like(video_diff)
         median_state = np.median(state_diff)
 
-        for i in range(len(video_diff)):
-            start = max(0, i - window_size)
-            end = min(len(video_diff), i + window_size + 1)
-
-            local_state = state_diff[start:end]
-            state_activity = local_state.max()
+        # Max of state_diff over [i - window_size, i + window_size] for every frame
+        state_activity = maximum_filter1d(state_diff, size=2 * window_size + 1, mode="nearest")
 
-            if state_activity > median_state:
-                denoised[i] = video_diff[i]
-            else:
-                denoised[i] = video_diff[i] * 0.1
-
-        return denoised
+        return np.where(state_activity > median_state, video_diff, video_diff * 0.1)
 
     def compute_correlation(self, signal1: np.ndarray, signal2: np.ndarray) -> float:
         """Compute normalized correlation between two signals."""
-        s1_norm = (signal1 - signal1.mean()) / (signal1.std() + 1e-8)
-        s2_norm = (signal2 - signal2.mean()) / (signal2.std() + 1e-8)
-        return float(np.corrcoef(s1_norm, s2_norm)[0, 1])
+        s1 = np.asarray(signal1, dtype=np.float64)
+        s2 = np.asarray(signal2, dtype=np.float64)
+        m1, m2 = s1.mean(), s2.mean()
+
+        # Pearson r from moments: no normalized copies, no 2x2 covariance matrix
+        cov = np.dot(s1, s2) / len(s1) - m1 * m2
+        denom = np.sqrt(s1.var() * s2.var())
+        return float(cov / denom) if denom > 0 else float("nan")
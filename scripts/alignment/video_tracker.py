@@ -8,18 +8,220 @@ Supports multiple tracking methods:
 """
 
 from abc import ABC, abstractmethod
+from fractions import Fraction
 from pathlib import Path
 from typing import Literal
 
 import av
+import av.filter
 import numpy as np
 
+from ._numba import HAVE_NUMBA, njit
 from .robot_config import get_robot_config
 
+# 8-bit formats whose first plane is the full-resolution luma (Y) plane
+_LUMA_PLANE_FORMATS = frozenset({
+    "yuv420p", "yuvj420p", "yuv422p", "yuvj422p", "yuv444p", "yuvj444p", "nv12", "nv21",
+})
+
+
+# Limited-range (16-235) luma to full-range gray, identical to swscale's
+# yuv -> gray conversion used by to_ndarray(format="gray")
+_LIMITED_TO_FULL = np.clip(np.round((np.arange(256) - 16) * 255 / 219), 0, 255).astype(np.uint8)
+
+
+def _gray_roi(frame: av.VideoFrame, window: tuple[slice, slice]) -> np.ndarray:
+    """
+    Full-range grayscale uint8 pixels of `window` in a decoded frame.
+
+    For 8-bit YUV frames the ROI is read straight from the Y plane, skipping
+    the whole-frame swscale conversion done by to_ndarray(format="gray").
+    Limited-range luma (most H.264/HEVC video) is expanded to 0-255 through
+    a lookup table so the values match that conversion exactly.
+    """
+    if frame.format.name not in _LUMA_PLANE_FORMATS:
+        return frame.to_ndarray(format="gray")[window]
+    plane = frame.planes[0]
+    luma = np.frombuffer(plane, dtype=np.uint8)[:plane.line_size * plane.height]
+    roi = luma.reshape(plane.height, plane.line_size)[:, :plane.width][window]
+    if frame.format.name.startswith("yuvj") or frame.color_range == 2:  # AVCOL_RANGE_JPEG
+        return roi
+    return _LIMITED_TO_FULL[roi]
+
+
+def _expected_frames(stream, frame_range: tuple[int, int]) -> int:
+    """Number of frames compute_diffs will produce, estimated from stream metadata."""
+    start_frame, end_frame = frame_range
+    if end_frame != -1:
+        return max(end_frame - start_frame + 1, 1)
+    total = stream.frames
+    if not total and stream.duration and stream.average_rate:
+        total = int(stream.duration * stream.time_base * stream.average_rate) + 1
+    return max((total or 0) - start_frame, 1)
+
+
+def _decode_range(container, stream, frame_range: tuple[int, int]):
+    """
+    Yield decoded frames with index in [start_frame, end_frame] (-1: until the end).
+
+    For start_frame > 0 the container is first seeked to the keyframe at or
+    before start_frame, and frame indices are recovered from pts, so only the
+    frames between that keyframe and start_frame are decoded and dropped.
+    """
+    start_frame, end_frame = frame_range
+    rate, time_base = stream.average_rate, stream.time_base
+    seeked = start_frame > 0 and bool(rate) and time_base is not None
+    if seeked:
+        offset = stream.start_time or 0
+        target = offset + int(Fraction(start_frame) / rate / time_base)
+        container.seek(target, stream=stream, backward=True, any_frame=False)
+
+    frame_idx = 0
+    for frame in container.decode(stream):
+        if seeked and frame.pts is not None:
+            frame_idx = round((frame.pts - offset) * time_base * rate)
+        if frame_idx < start_frame:
+            frame_idx += 1
+            continue
+        if end_frame != -1 and frame_idx > end_frame:
+            break
+        yield frame
+        frame_idx += 1
+
+
+def _grow(diffs: np.ndarray) -> np.ndarray:
+    """Double the capacity of the diffs buffer when the estimate was too small."""
+    return np.concatenate([diffs, np.empty_like(diffs)])
+
+
+def _roi_mad(roi: np.ndarray, prev: np.ndarray, work: np.ndarray) -> float:
+    """Mean absolute difference of two uint8 ROIs, using `work` (int16) as scratch."""
+    np.subtract(roi, prev, out=work, dtype=np.int16)
+    np.abs(work, out=work)
+    return float(work.mean())
+
+
+def _changed_pixels(mask: np.ndarray, prev_mask: np.ndarray) -> int:
+    """
+    Number of positions where two 0/1 uint8 masks differ.
+
+    XORs eight pixels per 64-bit word when both masks are contiguous; as each
+    byte is 0 or 1, the popcount of the XOR is the number of changed pixels.
+    """
+    if mask.size % 8 or not (mask.flags.c_contiguous and prev_mask.flags.c_contiguous):
+        return int(np.count_nonzero(mask != prev_mask))
+    changed = mask.reshape(-1).view(np.uint64) ^ prev_mask.reshape(-1).view(np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return int(np.bitwise_count(changed).sum())
+    return int(np.count_nonzero(changed.view(np.uint8)))
+
+
+def _black_diff(roi: np.ndarray, prev_mask: np.ndarray, mask: np.ndarray,
+                threshold: int) -> float:
+    """
+    Write the below-threshold mask of a uint8 ROI into `mask`.
+
+    Returns the fraction of pixels that differ from `prev_mask`.
+    """
+    np.less(roi, threshold, out=mask)
+    return _changed_pixels(mask, prev_mask) / mask.size
+
+
+def _orange_diff(roi: np.ndarray, prev_mask: np.ndarray, mask: np.ndarray,
+                 r_min: float, g_min: float, g_max: float, b_max: float) -> float:
+    """
+    Write the orange mask of a uint8 RGB ROI into `mask`.
+
+    Returns the fraction of pixels that differ from `prev_mask`.
+    """
+    r, g, b = roi[:, :, 0], roi[:, :, 1], roi[:, :, 2]
+    mask[...] = (
+        (r > r_min) &
+        (g > g_min) & (g < g_max) &
+        (b < b_max) &
+        (r > g) & (g > b)
+    )
+    return _changed_pixels(mask, prev_mask) / mask.size
+
+
+if HAVE_NUMBA:
+    # Single pass over the uint8 pixels with integer accumulation, no temporaries
+
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _roi_mad(roi, prev, work):
+        h, w = roi.shape
+        total = 0
+        for y in range(h):
+            for x in range(w):
+                total += abs(np.int32(roi[y, x]) - np.int32(prev[y, x]))
+        return total / (h * w)
+
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _black_diff(roi, prev_mask, mask, threshold):
+        h, w = roi.shape
+        changed = 0
+        for y in range(h):
+            for x in range(w):
+                m = roi[y, x] < threshold
+                mask[y, x] = m
+                changed += m != prev_mask[y, x]
+        return changed / (h * w)
+
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _orange_diff(roi, prev_mask, mask, r_min, g_min, g_max, b_max):
+        h, w = mask.shape
+        changed = 0
+        for y in range(h):
+            for x in range(w):
+                r, g, b = roi[y, x, 0], roi[y, x, 1], roi[y, x, 2]
+                m = (r > r_min and g > g_min and g < g_max and b < b_max
+                     and r > g and g > b)
+                mask[y, x] = m
+                changed += m != prev_mask[y, x]
+        return changed / (h * w)
+
 
 class BaseTracker(ABC):
     """Abstract base class for video trackers."""
 
+    # Hardware decode device type (e.g. "cuda"), None for software decode
+    hwaccel: str = None
+    # Take every stride-th ROI pixel in each axis (1 = full resolution)
+    stride: int = 1
+
+    def _set_decoding(self, hwaccel: str, stride: int) -> None:
+        """Store the decode options shared by all trackers."""
+        if stride < 1:
+            raise ValueError(f"ROI stride must be >= 1, got {stride}")
+        self.hwaccel = hwaccel
+        self.stride = stride
+
+    def _open(self, video_path: Path):
+        """Open a video and return (container, video stream)."""
+        if self.hwaccel:
+            try:
+                from av.codec.hwaccel import HWAccel
+            except ImportError:
+                raise RuntimeError(
+                    f"Hardware decoding ({self.hwaccel}) requires PyAV >= 14"
+                ) from None
+            # Frames are copied back to system memory (NV12), which _gray_roi reads directly
+            container = av.open(str(video_path), hwaccel=HWAccel(
+                device_type=self.hwaccel, allow_software_fallback=True))
+        else:
+            container = av.open(str(video_path))
+        stream = container.streams.video[0]
+        # FFmpeg frame/slice threading; frames are still returned in order
+        stream.thread_type = "AUTO"
+        stream.codec_context.thread_count = 0
+        return container, stream
+
+    def _roi_window(self, h: int, w: int) -> tuple[slice, slice]:
+        """Pixel slices of the configured ROI for an h x w frame."""
+        y_start, y_end = int(h * self.roi_y[0]), int(h * self.roi_y[1])
+        x_start, x_end = int(w * self.roi_x[0]), int(w * self.roi_x[1])
+        return slice(y_start, y_end, self.stride), slice(x_start, x_end, self.stride)
+
     @abstractmethod
     def compute_diffs(self, video_path: Path, frame_range: tuple[int, int]) -> np.ndarray:
         """Compute frame differences."""
@@ -29,7 +231,9 @@ class BaseTracker(ABC):
 class ROITracker(BaseTracker):
     """ROI-based gray frame difference tracker."""
 
-    def __init__(self, robot_type: str = "default", camera: str = None):
+    def __init__(self, robot_type: str = "default", camera: str = None,
+                 hwaccel: str = None, stride: int = 1):
+        self._set_decoding(hwaccel, stride)
         config = get_robot_config(robot_type)
         # Use default camera from robot config if not specified
         camera = camera or config.get_default_camera()
@@ -38,47 +242,41 @@ class ROITracker(BaseTracker):
         self.roi_x = roi_config["x"]
 
     def compute_diffs(self, video_path: Path, frame_range: tuple[int, int] = (0, -1)) -> np.ndarray:
-        container = av.open(str(video_path))
-        stream = container.streams.video[0]
+        container, stream = self._open(video_path)
 
         prev_roi = None
-        diffs = []
-        frame_idx = 0
-        start_frame, end_frame = frame_range
-
-        for frame in container.decode(stream):
-            if frame_idx < start_frame:
-                frame_idx += 1
-                continue
-            if end_frame != -1 and frame_idx > end_frame:
-                break
-
-            img = frame.to_ndarray(format="gray").astype(np.float32)
-            h, w = img.shape
-
-            # Extract ROI
-            y_start, y_end = int(h * self.roi_y[0]), int(h * self.roi_y[1])
-            x_start, x_end = int(w * self.roi_x[0]), int(w * self.roi_x[1])
-            roi = img[y_start:y_end, x_start:x_end]
-
+        diffs = np.empty(_expected_frames(stream, frame_range), dtype=np.float64)
+        count = 0
+
+        window = None
+        for frame in _decode_range(container, stream, frame_range):
+            # Extract ROI (pixel bounds are fixed for the whole video)
+            if window is None:
+                window = self._roi_window(frame.height, frame.width)
+            roi = _gray_roi(frame, window)
+
+            if count == len(diffs):
+                diffs = _grow(diffs)
             if prev_roi is not None:
-                diff = np.abs(roi - prev_roi).mean()
-                diffs.append(diff)
+                diffs[count] = _roi_mad(roi, prev_roi, work)
             else:
-                diffs.append(0)
+                # Scratch buffer for the signed difference, reused every frame
+                work = np.empty(roi.shape, dtype=np.int16)
+                diffs[count] = 0
+            count += 1
 
             prev_roi = roi
-            frame_idx += 1
 
         container.close()
-        return np.array(diffs)
+        return diffs[:count]
 
 
 class BlackRegionTracker(BaseTracker):
     """Black region detection tracker for dark grippers."""
 
     def __init__(self, robot_type: str = "default", camera: str = None,
-                 threshold: int = None):
+                 threshold: int = None, hwaccel: str = None, stride: int = 1):
+        self._set_decoding(hwaccel, stride)
         config = get_robot_config(robot_type)
         # Use default camera from robot config if not specified
         camera = camera or config.get_default_camera()
@@ -88,49 +286,43 @@ class BlackRegionTracker(BaseTracker):
         self.threshold = threshold or config.color_threshold.black_max_value
 
     def compute_diffs(self, video_path: Path, frame_range: tuple[int, int] = (0, -1)) -> np.ndarray:
-        container = av.open(str(video_path))
-        stream = container.streams.video[0]
-
-        prev_mask = None
-        diffs = []
-        frame_idx = 0
-        start_frame, end_frame = frame_range
-
-        for frame in container.decode(stream):
-            if frame_idx < start_frame:
-                frame_idx += 1
-                continue
-            if end_frame != -1 and frame_idx > end_frame:
-                break
-
-            img = frame.to_ndarray(format="gray")
-            h, w = img.shape
-
-            # Extract ROI
-            y_start, y_end = int(h * self.roi_y[0]), int(h * self.roi_y[1])
-            x_start, x_end = int(w * self.roi_x[0]), int(w * self.roi_x[1])
-            roi = img[y_start:y_end, x_start:x_end]
-
-            # Detect black regions
-            black_mask = (roi < self.threshold).astype(np.float32)
-
-            if prev_mask is not None:
-                diff = np.abs(black_mask - prev_mask).mean()
-                diffs.append(diff)
-            else:
-                diffs.append(0)
-
-            prev_mask = black_mask
-            frame_idx += 1
+        container, stream = self._open(video_path)
+
+        # Ping-pong mask buffers, allocated once the ROI shape is known
+        mask = prev_mask = None
+        diffs = np.empty(_expected_frames(stream, frame_range), dtype=np.float64)
+        count = 0
+
+        window = None
+        for frame in _decode_range(container, stream, frame_range):
+            # Extract ROI (pixel bounds are fixed for the whole video)
+            if window is None:
+                window = self._roi_window(frame.height, frame.width)
+            roi = _gray_roi(frame, window)
+
+            # Fraction of pixels entering or leaving the black region
+            first = mask is None
+            if first:
+                mask = np.empty(roi.shape, dtype=np.uint8)
+                prev_mask = np.empty_like(mask)
+            diff = _black_diff(roi, prev_mask, mask, self.threshold)
+            if count == len(diffs):
+                diffs = _grow(diffs)
+            diffs[count] = 0 if first else diff
+            count += 1
+
+            mask, prev_mask = prev_mask, mask
 
         container.close()
-        return np.array(diffs)
+        return diffs[:count]
 
 
 class ColorTracker(BaseTracker):
     """Orange color detection tracker - now robot-aware."""
 
-    def __init__(self, robot_type: str = "default", camera: str = None):
+    def __init__(self, robot_type: str = "default", camera: str = None,
+                 hwaccel: str = None, stride: int = 1):
+        self._set_decoding(hwaccel, stride)
         config = get_robot_config(robot_type)
         # Use robot-specific color ROI
         self.roi_y = config.color_threshold.color_roi_y
@@ -146,48 +338,70 @@ class ColorTracker(BaseTracker):
         }
 
     def compute_diffs(self, video_path: Path, frame_range: tuple[int, int] = (0, -1)) -> np.ndarray:
-        container = av.open(str(video_path))
-        stream = container.streams.video[0]
-
-        prev_mask = None
-        diffs = []
-        frame_idx = 0
-        start_frame, end_frame = frame_range
-
-        for frame in container.decode(stream):
-            if frame_idx < start_frame:
-                frame_idx += 1
-                continue
-            if end_frame != -1 and frame_idx > end_frame:
-                break
-
-            img = frame.to_ndarray(format="rgb24").astype(np.float32)
-            h, _w = img.shape[:2]
-
-            # Focus on configured region
-            roi = img[int(h * self.roi_y[0]):int(h * self.roi_y[1]), :]
-            r, g, b = roi[:, :, 0], roi[:, :, 1], roi[:, :, 2]
-
-            # Orange detection
-            c = self.color_config
-            orange_mask = (
-                (r > c["r_min"]) &
-                (g > c["g_min"]) & (g < c["g_max"]) &
-                (b < c["b_max"]) &
-                (r > g) & (g > b)
-            ).astype(np.float32)
-
-            if prev_mask is not None:
-                diff = np.abs(orange_mask - prev_mask).mean()
-                diffs.append(diff)
+        container, stream = self._open(video_path)
+
+        # Ping-pong mask buffers, allocated once the ROI shape is known
+        mask = prev_mask = None
+        diffs = np.empty(_expected_frames(stream, frame_range), dtype=np.float64)
+        count = 0
+        c = self.color_config
+        crop_graph = None
+        first_frame = True
+
+        for frame in _decode_range(container, stream, frame_range):
+            if first_frame:
+                # Built from the first decoded frame: with hwaccel its pixel
+                # format (e.g. nv12) differs from the software stream's
+                crop_graph = self._crop_graph(frame, stream.time_base)
+                first_frame = False
+            if crop_graph is not None:
+                # Only the configured rows go through the RGB conversion
+                crop_graph.push(frame)
+                roi = crop_graph.pull().to_ndarray(format="rgb24")[::self.stride, ::self.stride]
             else:
-                diffs.append(0)
+                img = frame.to_ndarray(format="rgb24")
+                h, _w = img.shape[:2]
 
-            prev_mask = orange_mask
-            frame_idx += 1
+                # Focus on configured region
+                roi = img[int(h * self.roi_y[0]):int(h * self.roi_y[1]):self.stride, ::self.stride]
+
+            # Orange detection fused with the diff against the previous mask
+            first = mask is None
+            if first:
+                mask = np.empty(roi.shape[:2], dtype=np.uint8)
+                prev_mask = np.empty_like(mask)
+            diff = _orange_diff(roi, prev_mask, mask, c["r_min"], c["g_min"], c["g_max"], c["b_max"])
+            if count == len(diffs):
+                diffs = _grow(diffs)
+            diffs[count] = 0 if first else diff
+            count += 1
+
+            mask, prev_mask = prev_mask, mask
 
         container.close()
-        return np.array(diffs)
+        return diffs[:count]
+
+    def _crop_graph(self, frame: av.VideoFrame, time_base: Fraction) -> av.filter.Graph | None:
+        """
+        Filter graph cropping frames like `frame` to the color ROI rows.
+
+        The crop only moves data pointers, so the rows outside the ROI are
+        never converted to RGB. Returns None when the ROI is empty.
+        """
+        h = frame.height
+        y_start, y_end = int(h * self.roi_y[0]), int(h * self.roi_y[1])
+        if y_end <= y_start:
+            return None
+
+        graph = av.filter.Graph()
+        buffer = graph.add_buffer(width=frame.width, height=h, format=frame.format.name,
+                                  time_base=time_base)
+        crop = graph.add("crop", f"w=iw:h={y_end - y_start}:x=0:y={y_start}:exact=1")
+        sink = graph.add("buffersink")
+        buffer.link_to(crop)
+        crop.link_to(sink)
+        graph.configure()
+        return graph
 
 
 class VideoTracker:
@@ -200,20 +414,25 @@ class VideoTracker:
     METHODS = Literal["roi", "black", "color"]
 
     def __init__(self, method: str = "roi", robot_type: str = "default",
-                 camera: str = None):
+                 camera: str = None, hwaccel: str = None, stride: int = 1):
         self.method = method
         self.robot_type = robot_type
         self.camera = camera
+        self.hwaccel = hwaccel
+        self.stride = stride
         self._tracker = self._create_tracker()
 
     def _create_tracker(self) -> BaseTracker:
         """Create tracker instance based on method."""
         if self.method == "roi":
-            return ROITracker(self.robot_type, self.camera)
+            return ROITracker(self.robot_type, self.camera, hwaccel=self.hwaccel,
+                              stride=self.stride)
         elif self.method == "black":
-            return BlackRegionTracker(self.robot_type, self.camera)
+            return BlackRegionTracker(self.robot_type, self.camera, hwaccel=self.hwaccel,
+                                      stride=self.stride)
         elif self.method == "color":
-            return ColorTracker(self.robot_type, self.camera)
+            return ColorTracker(self.robot_type, self.camera, hwaccel=self.hwaccel,
+                                stride=self.stride)
         else:
             raise ValueError(f"Unknown tracking method: {self.method}")
 
@@ -4,15 +4,120 @@ Visualization module for alignment analysis.
 
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+from ._numba import HAVE_NUMBA, njit
+
+
+def _offset_stats(offsets: np.ndarray) -> tuple[int, int, float]:
+    """(min, max, mean) of a non-empty int64 offset array."""
+    return int(offsets.min()), int(offsets.max()), float(offsets.mean())
+
+
+if HAVE_NUMBA:
+    # One pass over the offsets instead of three reductions. The input is
+    # always int64, so compile eagerly at import (loaded from the on-disk
+    # cache after the first run) rather than on the first report.
+
+    @njit("Tuple((i8, i8, f8))(i8[:])", cache=True)
+    def _offset_stats(offsets):
+        lo = hi = offsets[0]
+        total = 0
+        for v in offsets:
+            if v < lo:
+                lo = v
+            elif v > hi:
+                hi = v
+            total += v
+        return lo, hi, total / len(offsets)
+
+
+def _median(values: np.ndarray) -> float:
+    """Median of a non-empty array via O(N) selection instead of a full sort."""
+    k = len(values) // 2
+    if len(values) % 2:
+        return float(np.partition(values, k)[k])
+    part = np.partition(values, [k - 1, k])
+    return 0.5 * (float(part[k - 1]) + float(part[k]))
+
+
+def _minmax_decimate(y: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a long series to at most ~max_points vertices for plotting.
+
+    Each block of samples is replaced by its min and max (in that order), so
+    spikes stay visible at the rendered resolution. Short series are returned
+    unchanged with their frame indices.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n), y
+    block = -(-2 * n // max_points)  # ceil(n / (max_points / 2))
+    n_blocks = -(-n // block)
+    padded = np.empty(n_blocks * block, dtype=np.float64)
+    padded[:n] = y
+    padded[n:] = y[-1]
+    blocks = padded.reshape(n_blocks, block)
+    x = np.repeat(np.arange(n_blocks) * block, 2)
+    values = np.column_stack([blocks.min(axis=1), blocks.max(axis=1)]).ravel()
+    return x, values
+
 
 class AlignmentVisualizer:
     """Visualizer for alignment analysis results."""
 
     def __init__(self, figsize: tuple[int, int] = (14, 10)):
         self.figsize = figsize
+        # Figure and axes reused across reports, created on first use
+        self._fig = None
+        self._axes = None
+        # Axes -> persistent line artists of the timeline and zoomed plots
+        self._lines = {}
+        # Output buffer for the scaled video diff, regrown when an episode is longer
+        self._scaled = np.empty(0, dtype=np.float64)
+
+    def __getstate__(self):
+        # Do not ship the cached figure to worker processes; it is rebuilt on demand
+        state = self.__dict__.copy()
+        state["_fig"] = state["_axes"] = None
+        state["_lines"] = {}
+        state["_scaled"] = np.empty(0, dtype=np.float64)
+        return state
+
+    def _get_figure(self):
+        """Return the (figure, axes) to draw into, reset from the previous report."""
+        if self._fig is None:
+            # Imported here so that loading the package does not pay for matplotlib
+            from matplotlib.figure import Figure
+
+            # Plain Figure (no pyplot): rendered with Agg on save, no GUI backend or global state
+            self._fig = Figure(figsize=self.figsize)
+            self._axes = self._fig.subplots(3, 1)
+        else:
+            # Line plots update their artists in place; only the histogram is redrawn
+            self._axes[2].clear()
+        return self._fig, self._axes
+
+    def close(self) -> None:
+        """Release the cached figure."""
+        self._fig = self._axes = None
+        self._lines = {}
+
+    def _update_lines(self, ax, data: tuple, styles: tuple) -> None:
+        """
+        Set the data of the axes' persistent lines and rescale.
+
+        Lines are created from `styles` ((fmt, kwargs) per line) on first use.
+        """
+        lines = self._lines.get(ax)
+        if lines is None:
+            lines = self._lines[ax] = [ax.plot([], [], fmt, **kwargs)[0] for fmt, kwargs in styles]
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+        for line, (x, y) in zip(lines, data):
+            line.set_data(x, y)
+        ax.relim()
+        ax.autoscale_view()
 
     def create_report(self, state_diff: np.ndarray, video_diff: np.ndarray,
                       offsets: list[int], output_path: Path, episode: int,
@@ -28,12 +133,17 @@ class AlignmentVisualizer:
             episode: Episode index
             zoom_range: Optional (start, end) for zoomed view
         """
-        _fig, axes = plt.subplots(3, 1, figsize=self.figsize)
+        fig, axes = self._get_figure()
 
         # Normalize video_diff for comparison
-        video_max = video_diff.max() if video_diff.max() > 0 else 1
-        state_max = state_diff.max() if state_diff.max() > 0 else 1
-        video_diff_scaled = video_diff / video_max * state_max
+        video_max = video_diff.max()
+        video_max = video_max if video_max > 0 else 1
+        state_max = state_diff.max()
+        state_max = state_max if state_max > 0 else 1
+        if len(self._scaled) < len(video_diff):
+            self._scaled = np.empty(len(video_diff), dtype=np.float64)
+        video_diff_scaled = self._scaled[:len(video_diff)]
+        np.multiply(video_diff, state_max / video_max, out=video_diff_scaled)
 
         # Plot 1: Full timeline
         self._plot_timeline(axes[0], state_diff, video_diff_scaled)
@@ -43,21 +153,26 @@ class AlignmentVisualizer:
         self._plot_zoomed(axes[1], state_diff, video_diff_scaled, zoom_range)
 
         # Plot 3: Offset distribution
-        self._plot_distribution(axes[2], offsets)
+        self._plot_distribution(axes[2], np.asarray(offsets, dtype=np.int64))
 
-        plt.suptitle(f"Episode {episode}: Frame vs State/Action Alignment Analysis", fontsize=14)
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches="tight")
-        plt.close()
+        fig.suptitle(f"Episode {episode}: Frame vs State/Action Alignment Analysis", fontsize=14)
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=150, bbox_inches="tight")
 
     def _plot_timeline(self, ax, state_diff: np.ndarray, video_diff_scaled: np.ndarray) -> None:
         """Plot full timeline comparison."""
-        ax.plot(state_diff, "b-", linewidth=0.8, label="State diff", alpha=0.8)
-        ax.plot(video_diff_scaled, "r-", linewidth=0.8, label="Video diff (scaled)", alpha=0.6)
+        # About two vertices per output pixel at the saved 150 dpi
+        max_points = int(self.figsize[0] * 150 * 2)
+        self._update_lines(ax, (
+            _minmax_decimate(state_diff, max_points),
+            _minmax_decimate(video_diff_scaled, max_points),
+        ), (
+            # Rasterized so that vector outputs (svg/pdf) embed the dense timeline as an image
+            ("b-", dict(linewidth=0.8, label="State diff", alpha=0.8, rasterized=True)),
+            ("r-", dict(linewidth=0.8, label="Video diff (scaled)", alpha=0.6, rasterized=True)),
+        ))
         ax.set_ylabel("Difference")
         ax.set_title("State Diff vs Video Frame Diff (Full Timeline)")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
 
     def _plot_zoomed(self, ax, state_diff: np.ndarray, video_diff_scaled: np.ndarray,
                      zoom_range: tuple[int, int]) -> None:
@@ -65,25 +180,31 @@ class AlignmentVisualizer:
         start, end = zoom_range
         frames = np.arange(start, end)
 
-        ax.plot(frames, state_diff[start:end], "b-o", linewidth=2, markersize=3, label="State diff")
-        ax.plot(frames, video_diff_scaled[start:end], "r--s", linewidth=2, markersize=3,
-                label="Video diff (scaled)")
+        self._update_lines(ax, (
+            (frames, state_diff[start:end]),
+            (frames, video_diff_scaled[start:end]),
+        ), (
+            ("b-o", dict(linewidth=2, markersize=3, label="State diff")),
+            ("r--s", dict(linewidth=2, markersize=3, label="Video diff (scaled)")),
+        ))
         ax.set_xlabel("Frame")
         ax.set_ylabel("Difference")
         ax.set_title(f"Zoomed View: Frames {start}-{end}")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-
-    def _plot_distribution(self, ax, offsets: list[int]) -> None:
-        """Plot offset distribution histogram."""
-        if len(offsets) > 0:
-            bins = range(min(offsets) - 1, max(offsets) + 3)
-            ax.hist(offsets, bins=bins, align="left", color="steelblue",
-                    edgecolor="black", alpha=0.7)
-            ax.axvline(x=np.mean(offsets), color="red", linestyle="--",
-                       label=f"Mean: {np.mean(offsets):+.1f} frames")
-            ax.axvline(x=np.median(offsets), color="orange", linestyle="--",
-                       label=f"Median: {np.median(offsets):+.1f} frames")
+
+    def _plot_distribution(self, ax, offsets_arr: np.ndarray) -> None:
+        """Plot offset distribution histogram from an int64 offset array."""
+        if len(offsets_arr) > 0:
+            lo, hi, mean = _offset_stats(offsets_arr)
+            # Integer offsets: one bar per frame offset, with an empty bar on
+            # either side as the left-aligned unit-bin histogram had
+            counts = np.bincount(offsets_arr - (lo - 1), minlength=hi - lo + 3)
+            ax.bar(np.arange(lo - 1, hi + 2), counts, width=1.0, align="center",
+                   color="steelblue", edgecolor="black", alpha=0.7)
+            ax.axvline(x=mean, color="red", linestyle="--",
+                       label=f"Mean: {mean:+.1f} frames")
+            median = _median(offsets_arr)
+            ax.axvline(x=median, color="orange", linestyle="--",
+                       label=f"Median: {median:+.1f} frames")
 
         ax.set_xlabel("Offset (frames)")
         ax.set_ylabel("Count")
@@ -93,8 +214,14 @@ class AlignmentVisualizer:
 
     def _auto_zoom_range(self, state_diff: np.ndarray, window: int = 50) -> tuple[int, int]:
         """Auto-select a region with activity for zoomed view."""
-        activity = np.convolve(state_diff, np.ones(window), mode="same")
-        peak = np.argmax(activity)
+        # Boxcar sum centered as np.convolve(mode="same") would, from a running sum
+        n = len(state_diff)
+        left = window - 1 - (window - 1) // 2
+        csum = np.zeros(n + window, dtype=np.float64)
+        np.cumsum(state_diff, out=csum[left + 1:left + 1 + n])
+        csum[left + 1 + n:] = csum[left + n]
+        activity = csum[window:] - csum[:-window]
+        peak = int(np.argmax(activity))
         start = max(0, peak - window)
         end = min(len(state_diff), peak + window)
         return (start, end)
@@ -10,7 +10,12 @@ Usage:
         --task "Fold the laundry"
 """
 
+import io
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Tuple
 import h5py
@@ -18,36 +23,198 @@ import numpy as np
 import pyarrow as pa
 import pyarrow.parquet as pq
 import av
+import av.error
 import tyro
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，缺失时使用标准库 json
+    orjson = None
 
-def decode_jpeg_frames(hdf5_file, camera_name: str) -> np.ndarray:
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    _TURBOJPEG = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # 可选依赖，缺失时尝试 simplejpeg / PIL 解码
+    _TURBOJPEG = None
+
+try:
+    import simplejpeg  # wheel 自带 libjpeg-turbo，无需系统库
+except ImportError:
+    simplejpeg = None
+
+
+# 输出数据集中的相机顺序（与 info.json features 保持一致）
+CAMERA_KEYS = ("cam_env", "cam_left_wrist", "cam_right_wrist")
+
+# 每个 episode parquet 文件的固定 schema（与 info.json features 保持一致：
+# 14 维 float32 state/action，双臂各 6 关节 + 1 夹爪）
+STATE_DIM = 14
+EPISODE_SCHEMA = pa.schema([
+    ('observation.state', pa.list_(pa.float32(), STATE_DIM)),
+    ('action', pa.list_(pa.float32(), STATE_DIM)),
+    ('timestamp', pa.float32()),
+    ('frame_index', pa.int64()),
+    ('episode_index', pa.int64()),
+    ('index', pa.int64()),
+    ('task_index', pa.int64()),
+])
+
+# 并行视频编码的最大线程数（libx264 内部本身也是多线程，过多并发只会争抢 CPU）
+MAX_ENCODE_WORKERS = 4
+
+# 并行 JPEG 解码的最大线程数（libjpeg-turbo 与 PIL 解码时均会释放 GIL）
+MAX_DECODE_WORKERS = os.cpu_count() or 1
+
+# GPU (nvJPEG) 每批解码的帧数，限制单批显存占用
+CUDA_DECODE_BATCH = 256
+
+
+def decode_jpeg(jpeg_bytes) -> np.ndarray:
+    """解码单帧JPEG为 [H, W, 3] RGB uint8 数组
+
+    依次尝试 libjpeg-turbo (PyTurboJPEG)、simplejpeg，均未安装或解码失败时使用 PIL。
+    """
+    if _TURBOJPEG is not None:
+        try:
+            return _TURBOJPEG.decode(jpeg_bytes, pixel_format=TJPF_RGB)
+        except OSError:
+            pass
+    if simplejpeg is not None:
+        try:
+            return simplejpeg.decode_jpeg(jpeg_bytes, colorspace='RGB')
+        except ValueError:
+            pass
+
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(jpeg_bytes))
+    # 确保RGB格式
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image, dtype=np.uint8)
+
+
+def decode_jpeg_frames_cuda(jpeg_frames) -> np.ndarray | None:
+    """使用 torchvision (nvJPEG) 在 GPU 上批量解码JPEG
+
+    Args:
+        jpeg_frames: [N] JPEG字节序列
+
+    Returns:
+        [N, H, W, 3] RGB uint8 数组；torch/torchvision 未安装、无可用 CUDA
+        设备或解码失败时返回 None，由调用方退回 CPU 解码
+    """
+    try:
+        import torch
+        from torchvision.io import ImageReadMode, decode_jpeg
+    except ImportError:
+        return None
+    if not torch.cuda.is_available():
+        return None
+
+    decoded_frames = None
+    try:
+        for start in range(0, len(jpeg_frames), CUDA_DECODE_BATCH):
+            batch = [torch.frombuffer(bytearray(b), dtype=torch.uint8)
+                     for b in jpeg_frames[start:start + CUDA_DECODE_BATCH]]
+            # 一次调用批量解码，输出为 [3, H, W] CUDA 张量列表
+            images = decode_jpeg(batch, mode=ImageReadMode.RGB, device="cuda")
+            chunk = torch.stack(images).permute(0, 2, 3, 1).cpu().numpy()
+            if decoded_frames is None:
+                decoded_frames = np.empty((len(jpeg_frames),) + chunk.shape[1:], dtype=np.uint8)
+            decoded_frames[start:start + len(chunk)] = chunk
+    except Exception as e:
+        # nvJPEG 失败的异常类型不固定（RuntimeError、TypeError、torch 的
+        # 各类 Error 等），任何失败都退回 CPU 解码
+        print(f"  ⚠️  GPU JPEG 解码失败，使用 CPU 解码: {type(e).__name__}: {e}")
+        return None
+    return decoded_frames
+
+
+def decode_jpeg_frames(hdf5_file, camera_name: str, indices: np.ndarray | None = None,
+                       pool: ThreadPoolExecutor | None = None) -> np.ndarray:
     """解码JPEG压缩的图像帧
 
+    有可用 CUDA 设备时使用 nvJPEG 批量解码；否则首帧确定分辨率后预分配
+    输出数组，其余帧在线程池中并行解码并直接写入。
+
     Args:
         hdf5_file: HDF5文件对象
         camera_name: 相机名称 (cam_env, cam_left_wrist, cam_right_wrist)
+        indices: 只解码这些帧（按给定顺序），默认解码全部帧
+        pool: 共享的解码线程池（多路相机同时解码时复用），默认临时创建一个
 
     Returns:
         np.ndarray: [N, H, W, 3] RGB uint8图像数组
     """
-    from PIL import Image
-    import io
-
     jpeg_frames = hdf5_file[f"images/{camera_name}/frames_jpeg"][:]
-    decoded_frames = []
+    if indices is not None:
+        jpeg_frames = jpeg_frames[indices]
+    decoded_frames = decode_jpeg_frames_cuda(jpeg_frames)
+    if decoded_frames is not None:
+        return decoded_frames
+
+    first = decode_jpeg(jpeg_frames[0])
+    decoded_frames = np.empty((len(jpeg_frames),) + first.shape, dtype=np.uint8)
+    decoded_frames[0] = first
+
+    def decode_into(i: int) -> None:
+        decoded_frames[i] = decode_jpeg(jpeg_frames[i])
+
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=MAX_DECODE_WORKERS) as own_pool:
+            # list() 消费迭代器，使解码异常在此处抛出
+            list(own_pool.map(decode_into, range(1, len(jpeg_frames))))
+    else:
+        list(pool.map(decode_into, range(1, len(jpeg_frames))))
+
+    return decoded_frames
+
 
-    for jpeg_bytes in jpeg_frames:
-        # PIL解码JPEG
-        image = Image.open(io.BytesIO(jpeg_bytes))
-        # 确保RGB格式
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        # 转为numpy数组
-        image_array = np.array(image, dtype=np.uint8)
-        decoded_frames.append(image_array)
+class AlignedFrames:
+    """按对齐下标从全量解码图像中取帧的相机序列
 
-    return np.stack(decoded_frames, axis=0)
+    各片段只保存对齐下标，编码与统计时逐帧取用，不再为每个片段复制一份
+    [N, H, W, 3] 图像数组。
+
+    Args:
+        frames: [N_raw, H, W, 3] 全量解码的 RGB uint8 图像
+        indices: [N] 每个输出帧对应的 frames 下标
+    """
+
+    def __init__(self, frames: np.ndarray, indices: np.ndarray):
+        self.frames = frames
+        self.indices = indices
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return (len(self.indices),) + self.frames.shape[1:]
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, idx) -> np.ndarray:
+        return self.frames[self.indices[idx]]
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.frames[i]
+
+
+def ns_timestamps(hdf5_group) -> np.ndarray:
+    """将 timestamp_sec / timestamp_nanosec 合成为 int64 纳秒时间戳
+
+    整数运算是精确的；float64 在 ~1.7e18 ns 量级上只有约 256ns 的分辨率。
+
+    Args:
+        hdf5_group: HDF5组对象 (例如 f["joints/left_slave"])
+
+    Returns:
+        np.ndarray: [N] int64 纳秒时间戳
+    """
+    sec = hdf5_group["timestamp_sec"][:].astype(np.int64)
+    nsec = hdf5_group["timestamp_nanosec"][:].astype(np.int64)
+    return sec * 1_000_000_000 + nsec
 
 
 def reconstruct_joint_vector(hdf5_group, num_joints=6) -> np.ndarray:
@@ -60,11 +227,36 @@ def reconstruct_joint_vector(hdf5_group, num_joints=6) -> np.ndarray:
     Returns:
         np.ndarray: [N, num_joints] 关节位置数组
     """
-    joints = []
-    for i in range(1, num_joints + 1):
-        joint_key = f"joint{i}_pos"
-        joints.append(hdf5_group[joint_key][:])
-    return np.column_stack(joints)
+    first = hdf5_group["joint1_pos"]
+    # 按关节逐行直接读入预分配的 [num_joints, N] 连续缓冲区，返回转置视图，
+    # 省去各关节的中间数组和 column_stack 拷贝
+    joints = np.empty((num_joints, first.shape[0]), dtype=first.dtype)
+    for i in range(num_joints):
+        hdf5_group[f"joint{i + 1}_pos"].read_direct(joints[i])
+    return joints.T
+
+
+def nearest_timestamp_indices(ref_timestamps: np.ndarray, data_timestamps: np.ndarray) -> np.ndarray:
+    """对每个参考时间戳，找到单调递增的 data_timestamps 中最近的下标
+
+    与逐帧 np.argmin(np.abs(data_timestamps - ts)) 等价（距离相等时取左侧），
+    但只需一次二分查找，避免 N_ref × N_data 的差值数组。
+
+    Args:
+        ref_timestamps: [N_ref] 参考时间戳
+        data_timestamps: [N_data] 单调递增的数据时间戳
+
+    Returns:
+        np.ndarray: [N_ref] int64 最近邻下标
+    """
+    ref_timestamps = np.asarray(ref_timestamps)
+    if len(data_timestamps) == 1:
+        return np.zeros(len(ref_timestamps), dtype=np.int64)
+    right = np.searchsorted(data_timestamps, ref_timestamps)
+    np.clip(right, 1, len(data_timestamps) - 1, out=right)
+    left = right - 1
+    pick_right = (data_timestamps[right] - ref_timestamps) < (ref_timestamps - data_timestamps[left])
+    return np.where(pick_right, right, left)
 
 
 def align_data_to_reference(ref_timestamps, data, data_timestamps, data_name, method='nearest'):
@@ -80,18 +272,22 @@ def align_data_to_reference(ref_timestamps, data, data_timestamps, data_name, me
     Returns:
         aligned_data: [N_ref, ...] 对齐后的数据
     """
+    nearest_indices = nearest_timestamp_indices(ref_timestamps, data_timestamps)
+
     if method == 'nearest':
         # 最近邻对齐（原方法）
-        aligned_indices = []
-        for ref_ts in ref_timestamps:
-            closest_idx = np.argmin(np.abs(data_timestamps - ref_ts))
-            aligned_indices.append(closest_idx)
-        aligned_data = data[aligned_indices]
+        aligned_data = data[nearest_indices]
 
     elif method == 'linear':
         # 线性插值对齐
         from scipy.interpolate import interp1d
 
+        # 以首个数据时间戳为原点：插值内部会转为 float64，相对时间在纳秒级仍然精确，
+        # 而 ~1.7e18 ns 的绝对时间戳只有约 256ns 的分辨率
+        origin = data_timestamps[0]
+        data_timestamps = data_timestamps - origin
+        ref_timestamps = ref_timestamps - origin
+
         # 对于多维数据，需要逐维度插值
         if data.ndim == 1:
             interp_func = interp1d(
@@ -116,7 +312,6 @@ def align_data_to_reference(ref_timestamps, data, data_timestamps, data_name, me
         raise ValueError(f"Unknown alignment method: {method}. Supported: 'nearest', 'linear'")
 
     # 计算对齐质量（基于最近邻误差）
-    nearest_indices = [np.argmin(np.abs(data_timestamps - ts)) for ts in ref_timestamps]
     time_errors = np.abs(data_timestamps[nearest_indices] - ref_timestamps)
     print(f"  {data_name}: method={method}, 平均误差={np.mean(time_errors)/1e6:.2f}ms, 最大误差={np.max(time_errors)/1e6:.2f}ms")
 
@@ -289,9 +484,9 @@ def load_episode_v1_format(
         (segments, quality_meta):
         - segments: 有效片段列表，每个元素为:
           {
-              'images_env': [N, H, W, 3] uint8,
-              'images_left_wrist': [N, H, W, 3] uint8,
-              'images_right_wrist': [N, H, W, 3] uint8,
+              'images_env': AlignedFrames, [N, H, W, 3] uint8,
+              'images_left_wrist': AlignedFrames, [N, H, W, 3] uint8,
+              'images_right_wrist': AlignedFrames, [N, H, W, 3] uint8,
               'state': [N, 14] float32,
               'action': [N, 14] float32
           }
@@ -302,9 +497,9 @@ def load_episode_v1_format(
     with h5py.File(ep_path, "r") as f:
         # ========== 1. 确定参考基准时间戳 (最少帧数相机) ==========
         cameras_info = {
-            'cam_env': f["images/cam_env/timestamps"][:],
-            'cam_left_wrist': f["images/cam_left_wrist/timestamps"][:],
-            'cam_right_wrist': f["images/cam_right_wrist/timestamps"][:]
+            'cam_env': f["images/cam_env/timestamps"][:].astype(np.int64, copy=False),
+            'cam_left_wrist': f["images/cam_left_wrist/timestamps"][:].astype(np.int64, copy=False),
+            'cam_right_wrist': f["images/cam_right_wrist/timestamps"][:].astype(np.int64, copy=False)
         }
 
         # 收集相机质量信息
@@ -334,16 +529,12 @@ def load_episode_v1_format(
         if has_master:
             joint_groups += ["joints/left_master", "joints/right_master"]
 
-        all_joint_end_ts = []
-        for grp in joint_groups:
-            sec = f[f"{grp}/timestamp_sec"][:]
-            nsec = f[f"{grp}/timestamp_nanosec"][:]
-            ts = sec * 1e9 + nsec
-            all_joint_end_ts.append(ts[-1])
+        # 各关节源的时间戳只读取一次，边界裁剪与后续对齐共用
+        joint_timestamps = {grp: ns_timestamps(f[grp]) for grp in joint_groups}
+        all_joint_end_ts = [ts[-1] for ts in joint_timestamps.values()]
 
         # 用 left_slave 计算头帧时延（估算图像与关节的固有延迟）
-        left_slave_ts = (f["joints/left_slave/timestamp_sec"][:] * 1e9
-                         + f["joints/left_slave/timestamp_nanosec"][:])
+        left_slave_ts = joint_timestamps["joints/left_slave"]
         img_first_ts = reference_timestamps[0]
         joint_nearest_idx = np.argmin(np.abs(left_slave_ts - img_first_ts))
         joint_nearest_ts = left_slave_ts[joint_nearest_idx]
@@ -398,50 +589,40 @@ def load_episode_v1_format(
             }
             return [], quality_meta
 
-        # ========== 2. 全量解码图像（只做一次） ==========
-        print("\n📸 图像解码:")
-        images_env_raw = decode_jpeg_frames(f, "cam_env")
-        print(f"  cam_env: {images_env_raw.shape}")
-        images_left_raw = decode_jpeg_frames(f, "cam_left_wrist")
-        print(f"  cam_left_wrist: {images_left_raw.shape}")
-        images_right_raw = decode_jpeg_frames(f, "cam_right_wrist")
-        print(f"  cam_right_wrist: {images_right_raw.shape}")
-
-        # ========== 3. 读取全量关节原始数据（只做一次） ==========
-        # 3.1 left slave
+        # ========== 2. 读取全量关节原始数据（只做一次） ==========
+        # 2.1 left slave
         left_joints_raw = reconstruct_joint_vector(f["joints/left_slave"], 6)
         left_gripper_raw = f["joints/left_slave/gripper_mapping_controller_pos"][:][:, np.newaxis]
-        left_joint_sec = f["joints/left_slave/timestamp_sec"][:]
-        left_joint_nsec = f["joints/left_slave/timestamp_nanosec"][:]
-        left_joint_timestamps = left_joint_sec * 1e9 + left_joint_nsec
+        # 关节与夹爪共用同一组时间戳：拼成 [N, 7] 后每个片段只需对齐一次；
+        # 直接以 state 的 float32 存储，对齐结果拼接后无需再转换类型
+        left_slave_raw = np.concatenate([left_joints_raw, left_gripper_raw], axis=1, dtype=np.float32)
+        left_joint_timestamps = joint_timestamps["joints/left_slave"]
 
-        # 3.2 right slave
+        # 2.2 right slave
         right_joints_raw = reconstruct_joint_vector(f["joints/right_slave"], 6)
         right_gripper_raw = f["joints/right_slave/gripper_mapping_controller_pos"][:][:, np.newaxis]
-        right_joint_sec = f["joints/right_slave/timestamp_sec"][:]
-        right_joint_nsec = f["joints/right_slave/timestamp_nanosec"][:]
-        right_joint_timestamps = right_joint_sec * 1e9 + right_joint_nsec
+        right_slave_raw = np.concatenate([right_joints_raw, right_gripper_raw], axis=1, dtype=np.float32)
+        right_joint_timestamps = joint_timestamps["joints/right_slave"]
 
-        # 3.3 master（如果存在）
+        # 2.3 master（如果存在）
         if has_master:
             left_joints_cmd_raw = reconstruct_joint_vector(f["joints/left_master"], 6)
             left_gripper_cmd_raw = f["joints/left_master/eef_gripper_joint_pos"][:][:, np.newaxis]
-            left_slave_mapping = f["joints/left_slave/gripper_mapping_controller_pos"][:]
-            left_mapping_stats = {'min': left_slave_mapping.min(), 'max': left_slave_mapping.max()}
-            left_cmd_sec = f["joints/left_master/timestamp_sec"][:]
-            left_cmd_nsec = f["joints/left_master/timestamp_nanosec"][:]
-            left_cmd_timestamps = left_cmd_sec * 1e9 + left_cmd_nsec
+            left_master_raw = np.concatenate([left_joints_cmd_raw, left_gripper_cmd_raw], axis=1)
+            # slave 夹爪映射值已在 2.1 读入，无需再次读取数据集
+            left_mapping_stats = {'min': left_gripper_raw.min(), 'max': left_gripper_raw.max()}
+            left_cmd_timestamps = joint_timestamps["joints/left_master"]
 
             right_joints_cmd_raw = reconstruct_joint_vector(f["joints/right_master"], 6)
             right_gripper_cmd_raw = f["joints/right_master/eef_gripper_joint_pos"][:][:, np.newaxis]
-            right_slave_mapping = f["joints/right_slave/gripper_mapping_controller_pos"][:]
-            right_mapping_stats = {'min': right_slave_mapping.min(), 'max': right_slave_mapping.max()}
-            right_cmd_sec = f["joints/right_master/timestamp_sec"][:]
-            right_cmd_nsec = f["joints/right_master/timestamp_nanosec"][:]
-            right_cmd_timestamps = right_cmd_sec * 1e9 + right_cmd_nsec
+            right_master_raw = np.concatenate([right_joints_cmd_raw, right_gripper_cmd_raw], axis=1)
+            right_mapping_stats = {'min': right_gripper_raw.min(), 'max': right_gripper_raw.max()}
+            right_cmd_timestamps = joint_timestamps["joints/right_master"]
 
-        # ========== 4. 对每个 segment 独立执行对齐和组装 ==========
+        # ========== 3. 对每个 segment 独立执行对齐和组装 ==========
         results: List[Dict] = []
+        # 每个片段各相机的对齐帧下标，图像在所有片段对齐后统一解码
+        seg_frame_indices: List[Dict[str, np.ndarray]] = []
 
         for seg_idx, seg_timestamps in enumerate(segments):
             seg_label = f"片段 {seg_idx}" if len(segments) > 1 else "完整 episode"
@@ -449,73 +630,52 @@ def load_episode_v1_format(
             print(f"📦 处理 {seg_label} ({len(seg_timestamps)} 帧)")
             print(f"{'='*60}")
 
-            # 4.1 图像对齐
+            # 3.1 图像对齐（只对齐帧下标）
             print("\n📸 图像对齐:")
-            seg_images_env = align_data_to_reference(
-                seg_timestamps, images_env_raw, cameras_info['cam_env'],
-                'cam_env', method='nearest'
-            )
-            seg_images_left = align_data_to_reference(
-                seg_timestamps, images_left_raw, cameras_info['cam_left_wrist'],
-                'cam_left_wrist', method='nearest'
-            )
-            seg_images_right = align_data_to_reference(
-                seg_timestamps, images_right_raw, cameras_info['cam_right_wrist'],
-                'cam_right_wrist', method='nearest'
-            )
+            seg_frame_indices.append({
+                cam_key: align_data_to_reference(
+                    seg_timestamps, np.arange(len(cameras_info[cam_key])), cameras_info[cam_key],
+                    cam_key, method='nearest'
+                )
+                for cam_key in CAMERA_KEYS
+            })
 
-            # 4.2 关节对齐
+            # 3.2 关节对齐
             print("\n🦾 关节对齐:")
-            seg_left_joints = align_data_to_reference(
-                seg_timestamps, left_joints_raw, left_joint_timestamps,
-                'left_joints', method=alignment_method
+            seg_left_slave = align_data_to_reference(
+                seg_timestamps, left_slave_raw, left_joint_timestamps,
+                'left_slave', method=alignment_method
             )
-            seg_left_gripper = align_data_to_reference(
-                seg_timestamps, left_gripper_raw, left_joint_timestamps,
-                'left_gripper', method=alignment_method
-            )
-            seg_right_joints = align_data_to_reference(
-                seg_timestamps, right_joints_raw, right_joint_timestamps,
-                'right_joints', method=alignment_method
-            )
-            seg_right_gripper = align_data_to_reference(
-                seg_timestamps, right_gripper_raw, right_joint_timestamps,
-                'right_gripper', method=alignment_method
+            seg_right_slave = align_data_to_reference(
+                seg_timestamps, right_slave_raw, right_joint_timestamps,
+                'right_slave', method=alignment_method
             )
 
-            # 4.3 组装 State (14维)
+            # 3.3 组装 State (14维)
             state = np.concatenate([
-                seg_left_joints,   # [N, 6]
-                seg_left_gripper,  # [N, 1]
-                seg_right_joints,  # [N, 6]
-                seg_right_gripper  # [N, 1]
-            ], axis=1).astype(np.float32)
+                seg_left_slave,   # [N, 7] 关节 + 夹爪
+                seg_right_slave   # [N, 7] 关节 + 夹爪
+            ], axis=1).astype(np.float32, copy=False)
 
-            # 4.4 组装 Action (14维)
+            # 3.4 组装 Action (14维)
             if has_master:
                 print("\n🎮 动作对齐:")
-                seg_left_joints_cmd = align_data_to_reference(
-                    seg_timestamps, left_joints_cmd_raw, left_cmd_timestamps,
-                    'left_joints_cmd', method=alignment_method
-                )
-                seg_left_gripper_cmd_aligned = align_data_to_reference(
-                    seg_timestamps, left_gripper_cmd_raw, left_cmd_timestamps,
-                    'left_gripper_cmd', method=alignment_method
-                )
-                seg_right_joints_cmd = align_data_to_reference(
-                    seg_timestamps, right_joints_cmd_raw, right_cmd_timestamps,
-                    'right_joints_cmd', method=alignment_method
+                seg_left_master = align_data_to_reference(
+                    seg_timestamps, left_master_raw, left_cmd_timestamps,
+                    'left_master', method=alignment_method
                 )
-                seg_right_gripper_cmd_aligned = align_data_to_reference(
-                    seg_timestamps, right_gripper_cmd_raw, right_cmd_timestamps,
-                    'right_gripper_cmd', method=alignment_method
+                seg_right_master = align_data_to_reference(
+                    seg_timestamps, right_master_raw, right_cmd_timestamps,
+                    'right_master', method=alignment_method
                 )
+                seg_left_joints_cmd = seg_left_master[:, :6]
+                seg_right_joints_cmd = seg_right_master[:, :6]
 
                 seg_left_gripper_cmd = map_master_eef_to_slave_mapping(
-                    seg_left_gripper_cmd_aligned, left_mapping_stats
+                    seg_left_master[:, 6:], left_mapping_stats
                 )
                 seg_right_gripper_cmd = map_master_eef_to_slave_mapping(
-                    seg_right_gripper_cmd_aligned, right_mapping_stats
+                    seg_right_master[:, 6:], right_mapping_stats
                 )
 
                 print(f"  ✓ 夹爪映射: master_eef -> slave_mapping 范围")
@@ -533,13 +693,34 @@ def load_episode_v1_format(
                 print(f"\n  ⚠️  警告: master数据不存在，复制slave作为action")
 
             results.append({
-                'images_env': seg_images_env,
-                'images_left_wrist': seg_images_left,
-                'images_right_wrist': seg_images_right,
                 'state': state,
                 'action': action
             })
 
+        # ========== 4. 只解码被对齐引用到的图像帧（每帧只解码一次） ==========
+        print("\n📸 图像解码:")
+        seg_bounds = np.cumsum([0] + [len(r['state']) for r in results])
+        camera_frames = {}
+        # 三路相机并行解码：一路读取 HDF5 JPEG 数据时，其它相机仍在解码。
+        # 逐帧解码共用一个 CPU 核数大小的线程池，避免每路相机各开一套线程
+        # (相机任务在单独的小线程池中等待帧任务，不会占满解码池而死锁)
+        with ThreadPoolExecutor(max_workers=MAX_DECODE_WORKERS) as decode_pool, \
+                ThreadPoolExecutor(max_workers=len(CAMERA_KEYS)) as camera_pool:
+            for cam_key in CAMERA_KEYS:
+                used = np.concatenate([indices[cam_key] for indices in seg_frame_indices])
+                needed, inverse = np.unique(used, return_inverse=True)
+                camera_frames[cam_key] = (
+                    camera_pool.submit(decode_jpeg_frames, f, cam_key, needed, decode_pool),
+                    inverse
+                )
+            for cam_key, (future, inverse) in camera_frames.items():
+                camera_frames[cam_key] = (future.result(), inverse)
+
+        for cam_key, (frames, inverse) in camera_frames.items():
+            print(f"  {cam_key}: {frames.shape} (原始 {len(cameras_info[cam_key])} 帧)")
+            for result, start, end in zip(results, seg_bounds[:-1], seg_bounds[1:]):
+                result[f"images_{cam_key.replace('cam_', '')}"] = AlignedFrames(frames, inverse[start:end])
+
         # ========== 5. 汇总报告 ==========
         total_frames = sum(len(r['state']) for r in results)
         print(f"\n✅ 数据加载完成: {len(results)} 个片段, 共 {total_frames} 帧\n")
@@ -555,27 +736,66 @@ def load_episode_v1_format(
         return results, quality_meta
 
 
-def encode_video_frames(frames: np.ndarray, output_path: Path, fps: int = 30):
-    """Encode RGB frame sequence to MP4 video."""
+@lru_cache(maxsize=None)
+def nvenc_available(width: int, height: int) -> bool:
+    """探测 FFmpeg 的 h264_nvenc 能否以该分辨率打开（需要 NVIDIA GPU 与驱动）"""
+    try:
+        ctx = av.CodecContext.create('h264_nvenc', 'w')
+        ctx.width = width
+        ctx.height = height
+        ctx.pix_fmt = 'yuv420p'
+        ctx.time_base = Fraction(1, 30)
+        ctx.open()
+    except (av.error.FFmpegError, ValueError):
+        return False
+    return True
+
+
+def encode_video_frames(frames, output_path: Path, fps: int = 30) -> Path:
+    """Encode RGB frame sequence ([N, H, W, 3] array or AlignedFrames) to MP4 video, returning its path.
+
+    Uses h264_nvenc when available. If NVENC fails to open or encode (e.g. the
+    driver's concurrent session limit is reached by parallel encodes), the
+    video is re-encoded from the start with libx264.
+    """
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    width, height = frames.shape[2], frames.shape[1]  # W, H from [N, H, W, C]
+    if nvenc_available(width, height):
+        try:
+            # GPU 硬件编码，固定 QP 与 libx264 CRF 23 的画质相当
+            _encode_h264(frames, output_path, fps, 'h264_nvenc',
+                         {'preset': 'p4', 'rc': 'constqp', 'qp': '23'})
+            return output_path
+        except av.error.FFmpegError as e:
+            print(f"  ⚠️  NVENC 编码失败，改用 libx264: {output_path.name} ({e})")
+    _encode_h264(frames, output_path, fps, 'h264', {'crf': '23', 'threads': '0'})
+    return output_path
+
+
+def _encode_h264(frames, output_path: Path, fps: int, codec: str, options: Dict[str, str]):
+    """Write frames to output_path with the given H.264 encoder (overwrites the file)."""
     container = av.open(str(output_path), mode='w')
-    stream = container.add_stream('h264', rate=fps)
-    stream.width = frames.shape[2]   # W from [N, H, W, C]
-    stream.height = frames.shape[1]  # H from [N, H, W, C]
-    stream.pix_fmt = 'yuv420p'
-    stream.options = {'crf': '23'}
-
-    for frame in frames:
-        av_frame = av.VideoFrame.from_ndarray(frame, format='rgb24')
-        for packet in stream.encode(av_frame):
+    try:
+        stream = container.add_stream(codec, rate=fps)
+        stream.options = options
+        stream.width = frames.shape[2]
+        stream.height = frames.shape[1]
+        stream.pix_fmt = 'yuv420p'
+
+        # 直接包装帧的 numpy 缓冲区（不再复制一份 RGB 数据）；RGB -> YUV420p 仍交给
+        # libswscale 的 SIMD 实现。旧版 PyAV 没有 from_numpy_buffer 时退回 from_ndarray
+        wrap_frame = getattr(av.VideoFrame, 'from_numpy_buffer', av.VideoFrame.from_ndarray)
+        for frame in frames:
+            av_frame = wrap_frame(np.ascontiguousarray(frame), format='rgb24')
+            for packet in stream.encode(av_frame):
+                container.mux(packet)
+
+        # Flush stream
+        for packet in stream.encode():
             container.mux(packet)
-
-    # Flush stream
-    for packet in stream.encode():
-        container.mux(packet)
-
-    container.close()
+    finally:
+        container.close()
 
 
 def create_episode_parquet(
@@ -587,22 +807,47 @@ def create_episode_parquet(
     """Create Parquet file for a single episode."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    num_frames = len(episode_data['state'])
-
-    # Create timestamp as float32 (seconds)
-    timestamps = (np.arange(num_frames) / float(fps)).astype(np.float32).tolist()
-
-    table = pa.table({
-        'observation.state': episode_data['state'].tolist(),
-        'action': episode_data['action'].tolist(),
-        'timestamp': timestamps,
-        'frame_index': np.arange(num_frames).tolist(),
-        'episode_index': [episode_index] * num_frames,
-        'index': np.arange(num_frames).tolist(),
-        'task_index': [0] * num_frames,
-    })
+    state = episode_data['state']
+    action = episode_data['action']
+    num_frames = len(state)
 
-    pq.write_table(table, output_path)
+    # Wrap the flat contiguous float32 buffers directly in the schema's fixed-size
+    # list types instead of building per-row Python lists
+    state_col = pa.FixedSizeListArray.from_arrays(
+        pa.array(np.ascontiguousarray(state, dtype=np.float32).reshape(-1)),
+        type=EPISODE_SCHEMA.field('observation.state').type)
+    action_col = pa.FixedSizeListArray.from_arrays(
+        pa.array(np.ascontiguousarray(action, dtype=np.float32).reshape(-1)),
+        type=EPISODE_SCHEMA.field('action').type)
+
+    # Create timestamp as float32 (seconds), vectorized and handed to Arrow without a list round-trip
+    timestamps = (np.arange(num_frames, dtype=np.float64) / float(fps)).astype(np.float32)
+
+    # Integer columns as int64 arrays (zero-copy into Arrow, no per-row PyInt boxing)
+    frame_col = np.arange(num_frames, dtype=np.int64)
+    episode_col = np.full(num_frames, episode_index, dtype=np.int64)
+    task_col = np.zeros(num_frames, dtype=np.int64)
+
+    table = pa.Table.from_arrays([
+        state_col,
+        action_col,
+        pa.array(timestamps),
+        pa.array(frame_col),
+        pa.array(episode_col),
+        pa.array(frame_col),
+        pa.array(task_col),
+    ], schema=EPISODE_SCHEMA)
+
+    # ZSTD + 字典编码: episode_index / task_index 在整个 episode 内为常量，
+    # 字典编码后几乎不占空间；ZSTD level 3 在压缩率和写入速度间折中
+    pq.write_table(
+        table, output_path,
+        compression='zstd',
+        compression_level=3,
+        use_dictionary=['episode_index', 'task_index'],
+        write_statistics=True,
+        data_page_size=1 << 20,
+    )
 
 
 def create_output_structure(output_dir: Path):
@@ -610,10 +855,9 @@ def create_output_structure(output_dir: Path):
     (output_dir / "meta").mkdir(parents=True, exist_ok=True)
     (output_dir / "data" / "chunk-000").mkdir(parents=True, exist_ok=True)
 
-    for video_key in ["observation.images.cam_env",
-                      "observation.images.cam_left_wrist",
-                      "observation.images.cam_right_wrist"]:
-        (output_dir / "videos" / "chunk-000" / video_key).mkdir(parents=True, exist_ok=True)
+    for cam_key in CAMERA_KEYS:
+        (output_dir / "videos" / "chunk-000" / f"observation.images.{cam_key}").mkdir(
+            parents=True, exist_ok=True)
 
 
 def generate_info_json(
@@ -746,14 +990,35 @@ def generate_info_json(
         }
     }
 
-    with open(output_dir / "meta" / "info.json", "w") as f:
-        json.dump(info, f, indent=2)
+    (output_dir / "meta" / "info.json").write_bytes(dump_json(info, indent=True))
+
+
+def _json_default(obj):
+    """标准库 json 的回退序列化：numpy 数组/标量转为 Python 对象"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dump_json(obj, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 JSON（numpy 数组可直接写入），优先使用 orjson
+
+    Args:
+        obj: 待序列化对象
+        indent: True 时按 2 空格缩进，否则输出单行（末尾均带换行）
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    text = json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=_json_default)
+    return (text + "\n").encode("utf-8")
 
 
 def generate_tasks_jsonl(output_dir: Path, task: str):
     """Generate tasks.jsonl metadata file in meta/ directory."""
-    with open(output_dir / "meta" / "tasks.jsonl", "w") as f:
-        f.write(json.dumps({"task_index": 0, "task": task}) + "\n")
+    (output_dir / "meta" / "tasks.jsonl").write_bytes(dump_json({"task_index": 0, "task": task}))
 
 
 def generate_episodes_jsonl(output_dir: Path, episodes_info: List[Dict], task: str):
@@ -764,13 +1029,38 @@ def generate_episodes_jsonl(output_dir: Path, episodes_info: List[Dict], task: s
         episodes_info: [{'episode_index': int, 'num_frames': int}, ...]
         task: 任务描述
     """
-    with open(output_dir / "meta" / "episodes.jsonl", "w") as f:
-        for ep_info in episodes_info:
-            f.write(json.dumps({
-                "episode_index": ep_info['episode_index'],
-                "tasks": [task],
-                "length": ep_info['num_frames']
-            }) + "\n")
+    (output_dir / "meta" / "episodes.jsonl").write_bytes(b"".join(
+        dump_json({
+            "episode_index": ep_info['episode_index'],
+            "tasks": [task],
+            "length": ep_info['num_frames']
+        })
+        for ep_info in episodes_info
+    ))
+
+
+def image_channel_stats(images: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per-channel (min, max, mean, std) of uint8 [..., C] images, normalized to [0, 1].
+
+    Works on the uint8 data directly: one 256-bin histogram per channel is the
+    only pass over the pixels, and min/max/mean/std are all read off it, so no
+    float copy of the images is made and the mean/std are exact.
+    """
+    num_channels = images.shape[-1]
+    levels = np.arange(256, dtype=np.float64)
+    min_vals = np.empty(num_channels)
+    max_vals = np.empty(num_channels)
+    mean_vals = np.empty(num_channels)
+    std_vals = np.empty(num_channels)
+    for c in range(num_channels):
+        hist = np.bincount(images[..., c].ravel(), minlength=256)
+        occupied = np.flatnonzero(hist)
+        min_vals[c] = occupied[0]
+        max_vals[c] = occupied[-1]
+        mean = hist @ levels / hist.sum()
+        mean_vals[c] = mean
+        std_vals[c] = np.sqrt(hist @ (levels - mean) ** 2 / hist.sum())
+    return min_vals / 255.0, max_vals / 255.0, mean_vals / 255.0, std_vals / 255.0
 
 
 def compute_episode_stats(episode_data: Dict, episode_index: int, fps: int) -> Dict:
@@ -786,17 +1076,17 @@ def compute_episode_stats(episode_data: Dict, episode_index: int, fps: int) -> D
         "episode_index": episode_index,
         "stats": {
             "observation.state": {
-                "min": state.min(axis=0).tolist(),
-                "max": state.max(axis=0).tolist(),
-                "mean": state.mean(axis=0).tolist(),
-                "std": state.std(axis=0).tolist(),
+                "min": state.min(axis=0),
+                "max": state.max(axis=0),
+                "mean": state.mean(axis=0),
+                "std": state.std(axis=0),
                 "count": [num_frames]
             },
             "action": {
-                "min": action.min(axis=0).tolist(),
-                "max": action.max(axis=0).tolist(),
-                "mean": action.mean(axis=0).tolist(),
-                "std": action.std(axis=0).tolist(),
+                "min": action.min(axis=0),
+                "max": action.max(axis=0),
+                "mean": action.mean(axis=0),
+                "std": action.std(axis=0),
                 "count": [num_frames]
             },
         }
@@ -805,24 +1095,19 @@ def compute_episode_stats(episode_data: Dict, episode_index: int, fps: int) -> D
     # Compute image statistics (normalize to [0, 1])
     for cam_key in ['cam_env', 'cam_left_wrist', 'cam_right_wrist']:
         images_key = f"images_{cam_key.replace('cam_', '')}"
-        images = episode_data[images_key].astype(np.float32) / 255.0
-
         # Sample 100 frames for image statistics (to reduce computation)
         num_samples = min(100, num_frames)
         sample_indices = np.linspace(0, num_frames - 1, num_samples, dtype=int)
-        images_sampled = images[sample_indices]
+        images_sampled = episode_data[images_key][sample_indices]
 
-        # Compute per-channel statistics
-        min_vals = images_sampled.min(axis=(0, 1, 2))  # [C]
-        max_vals = images_sampled.max(axis=(0, 1, 2))  # [C]
-        mean_vals = images_sampled.mean(axis=(0, 1, 2))  # [C]
-        std_vals = images_sampled.std(axis=(0, 1, 2))  # [C]
+        # Compute per-channel statistics on the uint8 samples
+        min_vals, max_vals, mean_vals, std_vals = image_channel_stats(images_sampled)
 
         stats["stats"][f"observation.images.{cam_key}"] = {
-            "min": [[[float(v)]] for v in min_vals],
-            "max": [[[float(v)]] for v in max_vals],
-            "mean": [[[float(v)]] for v in mean_vals],
-            "std": [[[float(v)]] for v in std_vals],
+            "min": min_vals.reshape(-1, 1, 1),  # [C, 1, 1]
+            "max": max_vals.reshape(-1, 1, 1),
+            "mean": mean_vals.reshape(-1, 1, 1),
+            "std": std_vals.reshape(-1, 1, 1),
             "count": [num_samples]
         }
 
@@ -877,9 +1162,9 @@ def compute_episode_stats(episode_data: Dict, episode_index: int, fps: int) -> D
 
 def generate_episodes_stats_jsonl(output_dir: Path, stats_list: list):
     """Generate episodes_stats.jsonl metadata file in meta/ directory."""
-    with open(output_dir / "meta" / "episodes_stats.jsonl", "w") as f:
-        for stats in stats_list:
-            f.write(json.dumps(stats) + "\n")
+    (output_dir / "meta" / "episodes_stats.jsonl").write_bytes(
+        b"".join(dump_json(stats) for stats in stats_list)
+    )
 
 
 def convert_hdf5_to_lerobot_v21(
@@ -947,37 +1232,56 @@ def convert_hdf5_to_lerobot_v21(
     episodes_info = []
     all_stats = []
 
-    for ep_idx, episode_data in enumerate(segments):
-        num_frames = len(episode_data['state'])
-        ep_tag = f"episode_{ep_idx:06d}"
-        print(f"\n{'='*60}")
-        print(f"📦 输出 {ep_tag} ({num_frames} 帧)")
-        print(f"{'='*60}")
-
-        # 3.1 Encode videos
-        print("  Encoding videos...")
-        for cam_key in ['cam_env', 'cam_left_wrist', 'cam_right_wrist']:
-            video_path = output_dir / "videos" / "chunk-000" / \
-                         f"observation.images.{cam_key}" / f"{ep_tag}.mp4"
-
-            images_key = f"images_{cam_key.replace('cam_', '')}"
-            print(f"    {cam_key}... ", end="", flush=True)
-            encode_video_frames(episode_data[images_key], video_path, fps)
-            print(f"✓ {video_path.stat().st_size / 1024 / 1024:.1f} MB")
-
-        # 3.2 Generate Parquet data file
-        parquet_path = output_dir / "data" / "chunk-000" / f"{ep_tag}.parquet"
-        create_episode_parquet(episode_data, parquet_path, episode_index=ep_idx, fps=fps)
-        print(f"  ✓ {parquet_path}")
-
-        # 3.3 Compute episode statistics
-        stats = compute_episode_stats(episode_data, episode_index=ep_idx, fps=fps)
-        all_stats.append(stats)
-
-        episodes_info.append({
-            'episode_index': ep_idx,
-            'num_frames': num_frames
-        })
+    # 视频目录对所有 episode 相同，只构建一次
+    video_dirs = {
+        cam_key: output_dir / "videos" / "chunk-000" / f"observation.images.{cam_key}"
+        for cam_key in CAMERA_KEYS
+    }
+
+    # 视频编码交给线程池：每个 (episode, 相机) 为一个独立任务，单 episode 时三路相机
+    # 也能并行编码，并与下方 parquet/统计计算重叠
+    # (PyAV 编码时释放 GIL，线程间直接共享帧数组，无需跨进程拷贝)
+    num_jobs = num_episodes * len(CAMERA_KEYS)
+    with ThreadPoolExecutor(max_workers=min(MAX_ENCODE_WORKERS, num_jobs)) as encode_pool:
+        video_futures = [
+            {
+                cam_key: encode_pool.submit(
+                    encode_video_frames,
+                    episode_data[f"images_{cam_key.replace('cam_', '')}"],
+                    video_dirs[cam_key] / f"episode_{ep_idx:06d}.mp4",
+                    fps
+                )
+                for cam_key in CAMERA_KEYS
+            }
+            for ep_idx, episode_data in enumerate(segments)
+        ]
+
+        for ep_idx, episode_data in enumerate(segments):
+            num_frames = len(episode_data['state'])
+            ep_tag = f"episode_{ep_idx:06d}"
+            print(f"\n{'='*60}")
+            print(f"📦 输出 {ep_tag} ({num_frames} 帧)")
+            print(f"{'='*60}")
+
+            # 3.1 Generate Parquet data file
+            parquet_path = output_dir / "data" / "chunk-000" / f"{ep_tag}.parquet"
+            create_episode_parquet(episode_data, parquet_path, episode_index=ep_idx, fps=fps)
+            print(f"  ✓ {parquet_path}")
+
+            # 3.2 Compute episode statistics
+            stats = compute_episode_stats(episode_data, episode_index=ep_idx, fps=fps)
+            all_stats.append(stats)
+
+            episodes_info.append({
+                'episode_index': ep_idx,
+                'num_frames': num_frames
+            })
+
+            # 3.3 Wait for this episode's videos
+            print("  Encoding videos...")
+            for cam_key, future in video_futures[ep_idx].items():
+                video_path = future.result()
+                print(f"    {cam_key}... ✓ {video_path.stat().st_size / 1024 / 1024:.1f} MB")
 
     # 4. Generate metadata files
     print("\nGenerating metadata files...")